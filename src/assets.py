@@ -0,0 +1,166 @@
+import os
+import shutil
+
+from build_log import DEBUG, log
+from manifest import hash_file
+
+
+LINK_MODES = ("copy", "hardlink", "reflink")
+
+# ioctl request number for FICLONE on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+
+def sync_directory(source, destination, manifest=None, use_hash=False, link_mode="copy"):
+    """
+    Incrementally mirrors the source directory into the destination directory.
+    A file is copied only if the destination copy is missing or differs in size
+    or modification time (or content, when use_hash is True). Unchanged files
+    are never rewritten. When a manifest is given, every synced file is recorded
+    in it, and files recorded by an earlier sync whose source is gone are removed.
+    link_mode "hardlink" or "reflink" shares data with the source instead of
+    copying it, falling back to a copy where the filesystem does not support it.
+    Returns a (copied, unchanged, removed) tuple of file counts.
+    """
+    # Ensure the source directory exists
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Source directory '{source}' does not exist.")
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"invalid link mode: {link_mode}")
+
+    os.makedirs(destination, exist_ok=True)
+    outputs = []
+    copied = 0
+    unchanged = 0
+
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        relative_path = os.path.relpath(root, source)
+        dest_path = os.path.join(destination, relative_path)
+        os.makedirs(dest_path, exist_ok=True)
+
+        for file_name in sorted(files):
+            src_file = os.path.join(root, file_name)
+            dest_file = os.path.normpath(os.path.join(dest_path, file_name))
+            outputs.append(dest_file)
+            if is_unchanged(src_file, dest_file, use_hash):
+                unchanged += 1
+            else:
+                with log.timed(DEBUG, "file_copied", f"Copied file: {src_file} -> {dest_file}", path=dest_file):
+                    sync_file(src_file, dest_file, link_mode)
+                copied += 1
+            if manifest is not None:
+                src_stat = os.stat(src_file)
+                manifest.record_asset(dest_file, src_file, src_stat.st_size, src_stat.st_mtime_ns)
+
+    removed = 0
+    if manifest is not None:
+        for stale_file in manifest.stale_assets(outputs):
+            if os.path.exists(stale_file):
+                os.remove(stale_file)
+                removed += 1
+                log.debug("file_removed", f"Removed stale file: {stale_file}", path=stale_file)
+            manifest.forget_asset(stale_file)
+
+    log.info(
+        "static_synced",
+        f"Synced '{source}' to '{destination}': {copied} copied, {unchanged} unchanged, {removed} removed.",
+        copied=copied,
+        unchanged=unchanged,
+        removed=removed,
+    )
+    return copied, unchanged, removed
+
+
+def prune_directory(directory, manifest, sibling_extensions=(), keep=()):
+    """
+    Removes every file under directory that the manifest does not record as a
+    page or asset, e.g. leftovers of an earlier build whose manifest was lost,
+    then removes the directories this leaves empty. Siblings of recorded files
+    with one of sibling_extensions (such as index.html.gz) are kept, and so are
+    the paths in keep.
+    Returns the number of files removed.
+    """
+    keep = {os.path.normpath(path) for path in keep}
+    removed = 0
+    for root, dirs, files in os.walk(directory, topdown=False):
+        for file_name in sorted(files):
+            path = os.path.join(root, file_name)
+            base, extension = os.path.splitext(path)
+            if _is_kept(path, manifest, keep) or (
+                extension in sibling_extensions and _is_kept(base, manifest, keep)
+            ):
+                continue
+            os.remove(path)
+            removed += 1
+            log.debug("file_removed", f"Removed unknown file: {path}", path=path)
+        if root != directory and not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+
+def _is_kept(path, manifest, keep):
+    return manifest.knows(path) or os.path.normpath(path) in keep
+
+
+def is_unchanged(src_file, dest_file, use_hash=False):
+    """
+    Returns True if dest_file already holds the contents of src_file.
+    """
+    try:
+        dest_stat = os.stat(dest_file)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src_file)
+    if os.path.samestat(src_stat, dest_stat):
+        # Hard link to the source
+        return True
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if use_hash:
+        return hash_file(src_file) == hash_file(dest_file)
+    return src_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def sync_file(src_file, dest_file, link_mode="copy"):
+    """
+    Replaces dest_file with the contents of src_file, preserving its metadata.
+    The new file is moved into place, so readers never see a partial copy.
+    """
+    tmp_file = f"{dest_file}.tmp"
+    if os.path.lexists(tmp_file):
+        os.remove(tmp_file)
+    if link_mode == "hardlink" and _try_hardlink(src_file, tmp_file):
+        os.replace(tmp_file, dest_file)
+        return
+    if link_mode == "reflink" and _try_reflink(src_file, tmp_file):
+        shutil.copystat(src_file, tmp_file)
+        os.replace(tmp_file, dest_file)
+        return
+    shutil.copy2(src_file, tmp_file)
+    os.replace(tmp_file, dest_file)
+
+
+def _try_hardlink(src_file, dest_file):
+    try:
+        os.link(src_file, dest_file)
+    except OSError:
+        # e.g. across filesystems or on a filesystem without hard links
+        return False
+    return True
+
+
+def _try_reflink(src_file, dest_file):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src_file, "rb") as src, open(dest_file, "wb") as dest:
+            fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+    except OSError:
+        # The filesystem does not support copy-on-write clones
+        if os.path.exists(dest_file):
+            os.remove(dest_file)
+        return False
+    return True
@@ -0,0 +1,468 @@
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from build_log import WARNING, log
+from corpus import CorpusGenerator
+from front_matter import read_metadata
+from htmlnode import LeafNode, ParentNode, render_html
+from inline_markdown import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from markdown_blocks import markdown_to_blocks, markdown_to_html_node
+import page_io
+from pages import extract_title, generate_page, generate_pages_recursive
+from template import load_template
+from textnode import TextNode, TextType
+
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+
+
+def chained_text_to_textnodes(text):
+    """
+    The original five-pass inline pipeline, kept as a baseline for text_to_textnodes.
+    """
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def resplit_nodes(old_nodes, extract, template, text_type):
+    """
+    The original split_nodes_image/split_nodes_link, kept as a baseline: every
+    match is rebuilt as markdown and the remaining text split on it again.
+    """
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.TEXT:
+            new_nodes.append(old_node)
+            continue
+        original_text = old_node.text
+        matches = extract(original_text)
+        if len(matches) == 0:
+            new_nodes.append(old_node)
+            continue
+        for text, url in matches:
+            sections = original_text.split(template.format(text, url), 1)
+            if sections[0] != "":
+                new_nodes.append(TextNode(sections[0], TextType.TEXT))
+            new_nodes.append(TextNode(text, text_type, url))
+            original_text = sections[1]
+        if original_text != "":
+            new_nodes.append(TextNode(original_text, TextType.TEXT))
+    return new_nodes
+
+
+def resplit_nodes_image(old_nodes):
+    return resplit_nodes(
+        old_nodes, lambda text: re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text), "![{}]({})", TextType.IMAGE
+    )
+
+
+def resplit_nodes_link(old_nodes):
+    return resplit_nodes(
+        old_nodes, lambda text: re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text), "[{}]({})", TextType.LINK
+    )
+
+
+class RecursiveLeafNode(LeafNode):
+    """
+    LeafNode with the original to_html, kept as a baseline for render_html.
+    """
+
+    __slots__ = ()
+
+    def props_to_html(self):
+        if self.props is None:
+            return ""
+        props_html = ""
+        for prop in self.props:
+            props_html += f' {prop}="{self.props[prop]}"'
+        return props_html
+
+    def to_html(self):
+        if self.value is None:
+            raise ValueError("invalid HTML: no value")
+        if self.tag is None:
+            return self.value
+        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+
+class RecursiveParentNode(ParentNode):
+    """
+    ParentNode with the original recursive to_html, kept as a baseline for render_html.
+    """
+
+    __slots__ = ()
+
+    props_to_html = RecursiveLeafNode.props_to_html
+
+    def to_html(self):
+        if self.tag is None:
+            raise ValueError("invalid HTML: no tag")
+        if self.children is None:
+            raise ValueError("invalid HTML: no children")
+        children_html = ""
+        for child in self.children:
+            children_html += child.to_html()
+        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+
+
+def wide_tree(paragraphs, leaf_cls=LeafNode, parent_cls=ParentNode):
+    return build_document(paragraphs * 7, TextNode, leaf_cls, parent_cls)[0]
+
+
+def deep_tree(depth, leaf_cls=LeafNode, parent_cls=ParentNode):
+    # Nested quotes and lists, as deeply nested markdown would produce
+    node = leaf_cls("a", "bottom", {"href": "/"})
+    for level in range(depth):
+        node = parent_cls("blockquote" if level % 2 else "li", [leaf_cls(None, f"level {level} "), node])
+    return node
+
+
+def link_heavy_paragraph(links):
+    return " ".join(
+        f"see [post {i}](/blog/post-{i}) and **note {i}**" for i in range(links)
+    )
+
+
+class DictNode:
+    """
+    Mirrors HTMLNode's layout before __slots__, with attributes in a per-instance __dict__.
+    """
+
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictTextNode:
+    """
+    Mirrors TextNode's layout before __slots__.
+    """
+
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+def build_document(nodes, text_cls, leaf_cls, parent_cls):
+    """
+    Builds a document of roughly the given number of nodes, shaped like a parsed
+    page: paragraphs of text, bold and link nodes plus the text nodes they came from.
+    """
+    paragraphs = []
+    texts = []
+    for i in range(nodes // 7):
+        texts.append(text_cls(f"paragraph {i} ", TextType.TEXT))
+        texts.append(text_cls(f"bold {i}", TextType.BOLD))
+        texts.append(text_cls(f"link {i}", TextType.LINK, f"/post/{i}"))
+        children = [
+            leaf_cls(None, f"paragraph {i} "),
+            leaf_cls("b", f"bold {i}"),
+            leaf_cls("a", f"link {i}", {"href": f"/post/{i}"}),
+        ]
+        paragraphs.append(parent_cls("p", children))
+    return parent_cls("div", paragraphs), texts
+
+
+def peak_memory(func, *args):
+    """
+    Returns the peak traced memory in bytes while running func.
+    """
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def best_time(func, *args, number=5, repeat=5):
+    """
+    Returns the best per-call time in seconds over several repeats.
+    """
+    timer = timeit.Timer(lambda: func(*args))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def bench_inline_links(options):
+    rows = []
+    for links in (10, 100, 500, 2000):
+        text = link_heavy_paragraph(links)
+        if chained_text_to_textnodes(text) != text_to_textnodes(text):
+            raise AssertionError(f"inline scanner output differs at {links} links")
+        rows.append((f"inline_links/chained/{links}", best_time(chained_text_to_textnodes, text, repeat=options.repeat), "s"))
+        rows.append((f"inline_links/scanner/{links}", best_time(text_to_textnodes, text, repeat=options.repeat), "s"))
+    return rows
+
+
+def bench_inline_spans(options):
+    rows = []
+    for kind, split, baseline, markup in (
+        ("links", split_nodes_link, resplit_nodes_link, "see [post {0}](/blog/post-{0}) now"),
+        ("images", split_nodes_image, resplit_nodes_image, "look ![photo {0}](/images/{0}.png) here"),
+    ):
+        for count in (10, 100, 1000):
+            nodes = [TextNode(" ".join(markup.format(i) for i in range(count)), TextType.TEXT)]
+            if baseline(nodes) != split(nodes):
+                raise AssertionError(f"span scanner output differs at {count} {kind}")
+            rows.append((f"inline_spans/{kind}/resplit/{count}", best_time(baseline, nodes, repeat=options.repeat), "s"))
+            rows.append((f"inline_spans/{kind}/spans/{count}", best_time(split, nodes, repeat=options.repeat), "s"))
+    return rows
+
+
+def bench_render(options):
+    rows = []
+    shapes = (("wide/10000", wide_tree, 10_000), ("wide/50000", wide_tree, 50_000), ("deep/400", deep_tree, 400))
+    for shape, make_tree, size in shapes:
+        baseline = make_tree(size, RecursiveLeafNode, RecursiveParentNode)
+        tree = make_tree(size)
+        if baseline.to_html() != render_html(tree):
+            raise AssertionError(f"render_html output differs on the {shape} tree")
+        rows.append((f"render/recursive/{shape}", best_time(baseline.to_html, repeat=options.repeat), "s"))
+        rows.append((f"render/stack/{shape}", best_time(render_html, tree, repeat=options.repeat), "s"))
+    return rows
+
+
+def bench_memory(options):
+    rows = []
+    for nodes in (10_000, 100_000):
+        before = peak_memory(build_document, nodes, DictTextNode, DictNode, DictNode)
+        after = peak_memory(build_document, nodes, TextNode, LeafNode, ParentNode)
+        rows.append((f"memory/dict_nodes/{nodes}", before, "B"))
+        rows.append((f"memory/slotted_nodes/{nodes}", after, "B"))
+    return rows
+
+
+class Corpus:
+    """
+    A synthetic corpus written to a temporary directory, shared by the suite benchmarks.
+    """
+
+    def __init__(self, options):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content_dir = os.path.join(self.tmp.name, "content")
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        generator = CorpusGenerator(options.seed, link_density=options.link_density, depth=options.depth)
+        self.paths = generator.write(self.content_dir, options.pages, options.blocks)
+        self.markdown = []
+        for path in self.paths:
+            with open(path, "r", encoding="utf-8") as page_file:
+                self.markdown.append(page_file.read())
+        self.blocks = [block for markdown in self.markdown for block in markdown_to_blocks(markdown)]
+        self.nodes = [markdown_to_html_node(markdown) for markdown in self.markdown]
+        with open(TEMPLATE_PATH, "r", encoding="utf-8") as template_file:
+            template = template_file.read()
+        with open(self.template_path, "w", encoding="utf-8") as template_file:
+            template_file.write(template)
+
+
+def bench_markdown_to_html_node(options, corpus):
+    def parse_all():
+        for markdown in corpus.markdown:
+            markdown_to_html_node(markdown)
+    return [("markdown_to_html_node/corpus", best_time(parse_all, number=1, repeat=options.repeat), "s")]
+
+
+def bench_text_to_textnodes(options, corpus):
+    # The inline text of every block, roughly as the block parsers pass it on
+    texts = [" ".join(block.split("\n")) for block in corpus.blocks if not block.startswith("```")]
+    def tokenize_all():
+        for text in texts:
+            text_to_textnodes(text)
+    return [("text_to_textnodes/corpus", best_time(tokenize_all, number=1, repeat=options.repeat), "s")]
+
+
+def bench_to_html(options, corpus):
+    def render_all():
+        for node in corpus.nodes:
+            node.to_html()
+    return [("to_html/corpus", best_time(render_all, number=1, repeat=options.repeat), "s")]
+
+
+def bench_metadata(options, corpus):
+    # Titles of every corpus page from a header scan, against parsing each page
+    def scan_all():
+        for path in corpus.paths:
+            read_metadata(path)
+    def parse_all():
+        for path in corpus.paths:
+            with open(path, "r", encoding="utf-8") as page_file:
+                markdown = page_file.read()
+            markdown_to_html_node(markdown)
+            extract_title(markdown)
+    return [
+        ("metadata/header_scan/corpus", best_time(scan_all, number=1, repeat=options.repeat), "s"),
+        ("metadata/full_parse/corpus", best_time(parse_all, number=1, repeat=options.repeat), "s"),
+    ]
+
+
+def bench_page_memory(options, corpus):
+    # Peak traced memory while generating each corpus page on its own
+    template = load_template(corpus.template_path, "/site/")
+    peaks = []
+    with tempfile.TemporaryDirectory() as dest_dir:
+        for index, path in enumerate(corpus.paths):
+            dest = os.path.join(dest_dir, f"{index}.html")
+            peaks.append(peak_memory(generate_page, path, corpus.template_path, dest, "/site/", template))
+    return [
+        ("page_memory/max/corpus", max(peaks), "B"),
+        ("page_memory/mean/corpus", sum(peaks) / len(peaks), "B"),
+    ]
+
+
+def bench_build(options, corpus):
+    def build():
+        with tempfile.TemporaryDirectory() as dest_dir:
+            generate_pages_recursive(corpus.content_dir, corpus.template_path, dest_dir, "/site/")
+    return [("generate_pages_recursive/corpus", best_time(build, number=1, repeat=options.repeat), "s")]
+
+
+def bench_large_page(options):
+    # A single multi-megabyte page, rendered whole and streamed block by block
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "changelog.md")
+        dest = os.path.join(tmp_dir, "changelog.html")
+        with open(source, "w", encoding="utf-8") as page_file:
+            page_file.write(CorpusGenerator(options.seed).page(20_000))
+        template = load_template(TEMPLATE_PATH, "/")
+
+        def render_whole():
+            with open(source, "r", encoding="utf-8") as page_file:
+                html = markdown_to_html_node(page_file.read()).to_html()
+            with open(dest, "w", encoding="utf-8") as dest_file:
+                dest_file.write(template.render(Content=html, Title="Changelog"))
+
+        rows.append(("large_page/whole/20000", peak_memory(render_whole), "B"))
+        threshold = page_io.MMAP_THRESHOLD
+        try:
+            page_io.MMAP_THRESHOLD = os.path.getsize(source) + 1
+            rows.append(("large_page/streamed/20000", peak_memory(generate_page, source, TEMPLATE_PATH, dest, "/", template), "B"))
+        finally:
+            page_io.MMAP_THRESHOLD = threshold
+        rows.append(("large_page/mapped/20000", peak_memory(generate_page, source, TEMPLATE_PATH, dest, "/", template), "B"))
+    return rows
+
+
+# Micro-benchmarks comparing an implementation against its baseline
+BENCHMARKS = {
+    "inline_links": bench_inline_links,
+    "inline_spans": bench_inline_spans,
+    "render": bench_render,
+    "memory": bench_memory,
+    "large_page": bench_large_page,
+}
+
+# Benchmarks over the synthetic corpus
+SUITE = {
+    "markdown_to_html_node": bench_markdown_to_html_node,
+    "text_to_textnodes": bench_text_to_textnodes,
+    "to_html": bench_to_html,
+    "metadata": bench_metadata,
+    "page_memory": bench_page_memory,
+    "build": bench_build,
+}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run the site generator benchmarks.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join([*BENCHMARKS, *SUITE])})")
+    parser.add_argument("--pages", type=int, default=200, help="corpus pages (default: 200)")
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per corpus page (default: 40)")
+    parser.add_argument("--link-density", type=float, default=0.1, help="fraction of corpus words that are links (default: 0.1)")
+    parser.add_argument("--depth", type=int, default=2, help="directory nesting of corpus pages (default: 2)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus random seed (default: 0)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats, the best is kept (default: 5)")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON to PATH")
+    parser.add_argument("--compare", metavar="PATH", help="compare against results saved with --json")
+    return parser.parse_args(argv)
+
+
+def run(options):
+    """
+    Runs the selected benchmarks and returns a JSON-serializable result dict.
+    """
+    names = options.names or [*BENCHMARKS, *SUITE]
+    unknown = [name for name in names if name not in BENCHMARKS and name not in SUITE]
+    if unknown:
+        raise ValueError(f"unknown benchmark(s): {', '.join(unknown)}")
+    # Keep the builds' totals out of the results
+    log.configure(WARNING)
+    results = {}
+    corpus = None
+    for name in names:
+        if name in BENCHMARKS:
+            rows = BENCHMARKS[name](options)
+        else:
+            if corpus is None:
+                corpus = Corpus(options)
+            rows = SUITE[name](options, corpus)
+        for label, value, unit in rows:
+            results[label] = {"value": value, "unit": unit}
+    if corpus is not None:
+        corpus.tmp.cleanup()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {
+            "pages": options.pages,
+            "blocks": options.blocks,
+            "link_density": options.link_density,
+            "depth": options.depth,
+            "seed": options.seed,
+        },
+        "results": results,
+    }
+
+
+def format_value(value, unit):
+    if unit == "s":
+        return f"{value * 1000:.3f} ms"
+    return f"{value / 1024:.1f} KiB"
+
+
+def main():
+    options = parse_args(sys.argv[1:])
+    report = run(options)
+    previous = {}
+    if options.compare:
+        with open(options.compare, "r", encoding="utf-8") as compare_file:
+            previous = json.load(compare_file)["results"]
+    header = f"{'benchmark':<40} {'current':>14}"
+    if previous:
+        header += f" {'previous':>14} {'ratio':>7}"
+    print(header)
+    for label, result in report["results"].items():
+        line = f"{label:<40} {format_value(result['value'], result['unit']):>14}"
+        if label in previous:
+            before = previous[label]["value"]
+            line += f" {format_value(before, result['unit']):>14} {result['value'] / before:>6.2f}x"
+        print(line)
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as json_file:
+            json.dump(report, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
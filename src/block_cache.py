@@ -0,0 +1,102 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+
+# Modules whose code determines the HTML rendered for a block. Their source is
+# hashed into every cache key, so editing the parser invalidates cached blocks.
+PARSER_MODULES = ("markdown_blocks.py", "inline_markdown.py", "textnode.py", "htmlnode.py")
+
+
+class BlockCache:
+    """
+    Memoizes the rendered HTML of markdown blocks, keyed by a hash of the block text.
+    The in-memory tier holds at most maxsize blocks and evicts the least recently
+    used one. With a directory, rendered blocks are also stored on disk, so they
+    survive across builds and are shared between processes.
+    """
+
+    def __init__(self, maxsize=4096, directory=None):
+        if maxsize < 1:
+            raise ValueError(f"invalid block cache size: {maxsize}")
+        self.maxsize = maxsize
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.salt = parser_fingerprint()
+
+    def __reduce__(self):
+        # Pickling (e.g. to a worker process) sends the settings, not the entries
+        return (BlockCache, (self.maxsize, self.directory))
+
+    def key(self, block):
+        digest = hashlib.blake2b(self.salt, digest_size=20)
+        digest.update(block.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, block):
+        """
+        Returns the cached HTML for block, or None.
+        """
+        key = self.key(block)
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return html
+        if self.directory is not None:
+            html = self._read(key)
+            if html is not None:
+                self._remember(key, html)
+                self.disk_hits += 1
+                return html
+        self.misses += 1
+        return None
+
+    def put(self, block, html):
+        key = self.key(block)
+        self._remember(key, html)
+        if self.directory is not None:
+            self._write(key, html)
+
+    def _remember(self, key, html):
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.html")
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as cache_file:
+                return cache_file.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key, html):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temporary name, so concurrent builds never clobber each other
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as cache_file:
+            cache_file.write(html)
+        os.replace(tmp_path, path)
+
+    def __repr__(self):
+        return f"BlockCache({len(self.entries)}/{self.maxsize}, {self.directory}, hits: {self.hits}, disk hits: {self.disk_hits}, misses: {self.misses})"
+
+
+def parser_fingerprint(modules=PARSER_MODULES):
+    """
+    Returns a digest of the source code of modules, by default the parser modules.
+    """
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in modules:
+        with open(os.path.join(directory, name), "rb") as module_file:
+            digest.update(module_file.read())
+    return digest.digest()
@@ -0,0 +1,161 @@
+import contextlib
+import json
+import sys
+import threading
+import time
+
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+# Above every event level: nothing is written, but events are still counted
+SILENT = 100
+
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+LEVEL_NAMES = {number: name for name, number in LEVELS.items()}
+FORMATS = ("summary", "text", "json")
+
+
+class BuildLog:
+    """
+    Leveled, buffered log of build events.
+    Every event has a level, a name ("page_written", "file_copied", ...), a
+    message and optional fields such as the path and duration_ms. Per-file
+    events are logged at DEBUG and totals at INFO.
+    Output formats:
+    "summary" prints events from INFO up and, on close(), one line with the
+    number (and total duration) of every kind of event, including the
+    per-file ones that were not printed;
+    "text" prints the message of every event at or above the level;
+    "json" prints every event at or above the level as a JSON object per line.
+    Lines are collected in a buffer and written to the stream (default: the
+    current sys.stdout) in batches of buffer_lines, and at once from WARNING up.
+    """
+
+    def __init__(self, level=INFO, format="summary", stream=None, buffer_lines=256):
+        self.lock = threading.Lock()
+        self.configure(level, format, stream, buffer_lines)
+
+    def configure(self, level=INFO, format="summary", stream=None, buffer_lines=256):
+        """
+        Resets the log with new settings, after writing out what is buffered.
+        """
+        if format not in FORMATS:
+            raise ValueError(f"invalid log format: {format}")
+        if hasattr(self, "buffer"):
+            self.flush()
+        self.level = LEVELS[level] if isinstance(level, str) else level
+        self.format = format
+        self.stream = stream
+        self.buffer_lines = buffer_lines
+        self.buffer = []
+        # {event: [count, total duration_ms]}
+        self.totals = {}
+        self._captured = None
+
+    def debug(self, event, message, **fields):
+        self.log(DEBUG, event, message, **fields)
+
+    def info(self, event, message, **fields):
+        self.log(INFO, event, message, **fields)
+
+    def warning(self, event, message, **fields):
+        self.log(WARNING, event, message, **fields)
+
+    def error(self, event, message, **fields):
+        self.log(ERROR, event, message, **fields)
+
+    def log(self, level, event, message, **fields):
+        record = {"time": time.time(), "level": level, "event": event, "message": message, **fields}
+        if self._captured is not None:
+            self._captured.append(record)
+            return
+        self.emit(record)
+
+    def emit(self, record):
+        """
+        Counts a record and, if its level is high enough, buffers its line.
+        """
+        with self.lock:
+            totals = self.totals.setdefault(record["event"], [0, 0.0])
+            totals[0] += 1
+            totals[1] += record.get("duration_ms", 0.0)
+            if record["level"] < self.level:
+                return
+            self.buffer.append(self._format(record))
+            if len(self.buffer) >= self.buffer_lines or record["level"] >= WARNING:
+                self._flush()
+
+    @contextlib.contextmanager
+    def capture(self):
+        """
+        Collects the records logged inside the block into the yielded list
+        instead of emitting them, e.g. so a worker process can send a page's
+        records back to be emitted, in page order, with replay().
+        """
+        previous = self._captured
+        self._captured = records = []
+        try:
+            yield records
+        finally:
+            self._captured = previous
+
+    def replay(self, records):
+        for record in records:
+            if self._captured is not None:
+                self._captured.append(record)
+            else:
+                self.emit(record)
+
+    @contextlib.contextmanager
+    def timed(self, level, event, message, **fields):
+        """
+        Logs an event with the duration_ms of the block once it finishes.
+        """
+        start = time.perf_counter()
+        yield
+        self.log(level, event, message, duration_ms=(time.perf_counter() - start) * 1000, **fields)
+
+    def format_summary(self):
+        """
+        Returns one line with the count and total duration of every event.
+        """
+        with self.lock:
+            parts = []
+            for event, (count, duration_ms) in sorted(self.totals.items()):
+                part = f"{count} {event}"
+                if duration_ms:
+                    part += f" ({duration_ms:.1f} ms)"
+                parts.append(part)
+        return "Build events: " + (", ".join(parts) if parts else "none") + "."
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        """
+        Writes the summary line in "summary" format and flushes the buffer.
+        """
+        if self.format == "summary" and self.level <= INFO:
+            self.info("summary", self.format_summary())
+        self.flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write("".join(self.buffer))
+        stream.flush()
+        self.buffer = []
+
+    def _format(self, record):
+        if self.format != "json":
+            return record["message"] + "\n"
+        return json.dumps({**record, "level": LEVEL_NAMES.get(record["level"], record["level"])}) + "\n"
+
+
+# The log every module writes to. It stays silent, e.g. in tests, until main
+# configures it from the command line.
+log = BuildLog(SILENT)
@@ -0,0 +1,95 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from build_log import log
+
+try:
+    import brotli
+except ImportError:
+    # Optional dependency; without it only .gz siblings are written
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css")
+
+
+def _gzip(data):
+    # mtime=0 keeps the output byte-for-byte reproducible
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+COMPRESSORS = {".gz": _gzip}
+if brotli is not None:
+    COMPRESSORS[".br"] = _brotli
+
+
+def precompress_file(path, compressors=None):
+    """
+    Writes a compressed sibling (index.html.gz, index.html.br, ...) of the file
+    at path for each compressor. A sibling is only rewritten when the file has
+    changed since it was compressed: siblings carry the file's mtime, so a
+    matching mtime means the sibling is current.
+    Returns the number of siblings written.
+    """
+    compressors = COMPRESSORS if compressors is None else compressors
+    stat = os.stat(path)
+    stale = []
+    for extension in compressors:
+        try:
+            if os.stat(path + extension).st_mtime_ns == stat.st_mtime_ns:
+                continue
+        except FileNotFoundError:
+            pass
+        stale.append(extension)
+    if not stale:
+        return 0
+    with open(path, "rb") as source_file:
+        data = source_file.read()
+    for extension in stale:
+        sibling = path + extension
+        tmp_path = f"{sibling}.tmp"
+        with open(tmp_path, "wb") as sibling_file:
+            sibling_file.write(compressors[extension](data))
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, sibling)
+    return len(stale)
+
+
+def precompress_tree(root, workers=None, compressors=None):
+    """
+    Precompresses every HTML and CSS file under root in a thread pool
+    (zlib and brotli release the GIL while compressing) and removes siblings
+    whose original file no longer exists. workers defaults to one per CPU core.
+    Returns a (written, removed) tuple of sibling counts.
+    """
+    compressors = COMPRESSORS if compressors is None else compressors
+    sources = []
+    orphans = []
+    for dir_path, dirs, files in os.walk(root):
+        names = set(files)
+        for file_name in sorted(files):
+            path = os.path.join(dir_path, file_name)
+            if file_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                sources.append(path)
+                continue
+            base, extension = os.path.splitext(file_name)
+            if extension in (".gz", ".br") and base.endswith(COMPRESSIBLE_EXTENSIONS) and base not in names:
+                orphans.append(path)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        written = sum(executor.map(lambda path: precompress_file(path, compressors), sources))
+    for orphan in orphans:
+        os.remove(orphan)
+
+    log.info(
+        "precompressed",
+        f"Precompressed '{root}': {written} file(s) written, {len(orphans)} removed ({', '.join(compressors)}).",
+        written=written,
+        removed=len(orphans),
+    )
+    return written, len(orphans)
@@ -0,0 +1,126 @@
+import argparse
+import os
+import random
+import sys
+
+
+# Relative weights of each block type in generated pages
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "code": 1,
+    "quote": 1,
+    "ulist": 1,
+    "olist": 1,
+}
+
+WORDS = (
+    "the ring fellowship shire hobbit wizard elf dwarf mountain river forest "
+    "road journey council shadow light tower king steward horse song tale "
+    "ancient quiet golden swift dark bright lonely merry weary hidden"
+).split()
+
+
+class CorpusGenerator:
+    """
+    Generates deterministic synthetic markdown for benchmarks.
+    The same seed and settings always produce the same pages.
+    block_mix weights the block types, link_density is the fraction of words
+    turned into links (with one image per ten links), and depth is how many
+    directory levels pages are nested under.
+    """
+
+    def __init__(self, seed=0, block_mix=None, link_density=0.1, depth=2):
+        self.rng = random.Random(seed)
+        self.block_mix = dict(block_mix or DEFAULT_BLOCK_MIX)
+        self.link_density = link_density
+        self.depth = depth
+
+    def words(self, count):
+        return [self.rng.choice(WORDS) for _ in range(count)]
+
+    def inline_text(self, count):
+        """
+        Returns a line of text with links, images and bold, italic and code spans.
+        """
+        parts = []
+        for word in self.words(count):
+            roll = self.rng.random()
+            if roll < self.link_density / 10:
+                parts.append(f"![{word}](/images/{word}.png)")
+            elif roll < self.link_density:
+                parts.append(f"[{word}](/blog/{word})")
+            elif roll < self.link_density + 0.05:
+                parts.append(f"**{word}**")
+            elif roll < self.link_density + 0.08:
+                parts.append(f"_{word}_")
+            elif roll < self.link_density + 0.1:
+                parts.append(f"`{word}`")
+            else:
+                parts.append(word)
+        return " ".join(parts)
+
+    def block(self, block_type):
+        if block_type == "paragraph":
+            return "\n".join(self.inline_text(12) for _ in range(self.rng.randint(1, 4)))
+        if block_type == "heading":
+            return "#" * self.rng.randint(2, 4) + " " + self.inline_text(4)
+        if block_type == "code":
+            lines = [f"print(\"{' '.join(self.words(3))}\")" for _ in range(self.rng.randint(2, 6))]
+            return "```\n" + "\n".join(lines) + "\n```"
+        if block_type == "quote":
+            return "\n".join("> " + self.inline_text(10) for _ in range(self.rng.randint(1, 3)))
+        if block_type == "ulist":
+            return "\n".join("- " + self.inline_text(6) for _ in range(self.rng.randint(2, 6)))
+        if block_type == "olist":
+            return "\n".join(f"{i}. " + self.inline_text(6) for i in range(1, self.rng.randint(3, 7)))
+        raise ValueError(f"invalid block type: {block_type}")
+
+    def page(self, blocks):
+        """
+        Returns the markdown for one page: a title followed by blocks drawn from the mix.
+        """
+        types = list(self.block_mix)
+        weights = [self.block_mix[block_type] for block_type in types]
+        parts = ["# " + " ".join(self.words(5)).title()]
+        for block_type in self.rng.choices(types, weights, k=blocks):
+            parts.append(self.block(block_type))
+        return "\n\n".join(parts) + "\n"
+
+    def page_path(self, index):
+        """
+        Returns the relative path of the index-th page, nested self.depth directories deep.
+        """
+        sections = [f"section-{(index // 10 ** level) % 10}" for level in range(self.depth, 0, -1)]
+        return os.path.join(*sections, f"page-{index}", "index.md")
+
+    def write(self, dest_dir, pages, blocks_per_page):
+        """
+        Writes pages markdown files under dest_dir and returns their paths.
+        """
+        paths = []
+        for index in range(pages):
+            path = os.path.join(dest_dir, self.page_path(index))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as page_file:
+                page_file.write(self.page(blocks_per_page))
+            paths.append(path)
+        return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic markdown corpus.")
+    parser.add_argument("dest", help="directory to write the corpus into")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument("--link-density", type=float, default=0.1)
+    parser.add_argument("--depth", type=int, default=2, help="directory levels above each page")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(sys.argv[1:])
+    generator = CorpusGenerator(args.seed, link_density=args.link_density, depth=args.depth)
+    paths = generator.write(args.dest, args.pages, args.blocks)
+    print(f"Wrote {len(paths)} page(s) to '{args.dest}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import datetime
+import io
+import itertools
+import tomllib
+
+
+def split_front_matter(lines):
+    """
+    Reads the front matter from the start of an iterator of lines that keep
+    their "\n": a header between "---" lines (simple YAML) or "+++" lines (TOML).
+    Only the header lines are consumed, so the body is not read until the
+    caller iterates over it.
+    Returns (fields, body_lines), where fields is empty for a page without
+    front matter.
+    """
+    lines = iter(lines)
+    first_line = next(lines, "")
+    delimiter = first_line.rstrip("\n")
+    if delimiter not in PARSERS:
+        return {}, itertools.chain([first_line], lines)
+    header = []
+    for line in lines:
+        if line.rstrip("\n") == delimiter:
+            return PARSERS[delimiter]("".join(header)), lines
+        header.append(line)
+    raise ValueError(f"Front matter is missing its closing '{delimiter}'")
+
+
+def split_markdown(markdown):
+    """
+    Splits markdown text into its front-matter fields and its body.
+    """
+    fields, lines = split_front_matter(io.StringIO(markdown, newline="\n"))
+    return fields, "".join(lines)
+
+
+def split_title(lines):
+    """
+    Reads the front matter (see split_front_matter) and, without a "title"
+    field, the body up to the line the title is taken from: the first line,
+    or after a header the first line that is not blank.
+    Returns (fields, title, body_lines), where body_lines still yields every
+    line of the body.
+    """
+    lines = iter(lines)
+    first_line = next(lines, "")
+    header = first_line.rstrip("\n") in PARSERS
+    fields, lines = split_front_matter(itertools.chain([first_line], lines))
+    read = []
+    # The body is only needed for a title the header does not give
+    if "title" not in fields:
+        for line in lines:
+            read.append(line)
+            if not header or line.strip():
+                break
+    return fields, title_from(fields, read[-1] if read else ""), itertools.chain(read, lines)
+
+
+def read_metadata(path):
+    """
+    Returns the (title, fields) of a markdown page, reading only its front
+    matter and, without a "title" field, the start of its body (see split_title).
+    """
+    with open(path, "r", encoding="utf-8") as page_file:
+        fields, title, _ = split_title(page_file)
+    return title, fields
+
+
+def read_fields(path):
+    """
+    Returns the front-matter fields of a markdown page, reading only its header.
+    """
+    with open(path, "r", encoding="utf-8") as page_file:
+        return split_front_matter(page_file)[0]
+
+
+def title_from(fields, first_line):
+    """
+    Returns the page title: the "title" field, else first_line, the line of
+    the body the title is taken from.
+    """
+    if "title" in fields:
+        return str(fields["title"])
+    return first_line.rstrip("\n").strip("# ").strip()
+
+
+def is_draft(fields):
+    return fields.get("draft") is True
+
+
+def parse_toml(text):
+    return _plain(tomllib.loads(text))
+
+
+def parse_yaml(text):
+    """
+    Parses the simple YAML used in front matter: "key: value" lines whose
+    values are scalars, flow lists ("[a, b]") or block lists of "- item" lines.
+    Nested mappings are not supported.
+    """
+    fields = {}
+    key = None
+    for number, line in enumerate(text.split("\n"), 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") or stripped == "-":
+            if key is None or (fields[key] is not None and not isinstance(fields[key], list)):
+                raise ValueError(f"Invalid front matter on line {number}: {stripped}")
+            if fields[key] is None:
+                fields[key] = []
+            fields[key].append(_yaml_scalar(stripped[1:].strip()))
+            continue
+        if line[0].isspace() or ":" not in stripped:
+            raise ValueError(f"Invalid front matter on line {number}: {stripped}")
+        key, value = stripped.split(":", 1)
+        key = key.strip()
+        value = value.strip()
+        if not value:
+            # A block list may follow
+            fields[key] = None
+        elif value.startswith("[") and value.endswith("]"):
+            fields[key] = [_yaml_scalar(item.strip()) for item in value[1:-1].split(",") if item.strip()]
+        else:
+            fields[key] = _yaml_scalar(value)
+    return fields
+
+
+PARSERS = {"---": parse_yaml, "+++": parse_toml}
+
+
+def _yaml_scalar(value):
+    if value[:1] in ("'", '"'):
+        # A quoted value ends at its closing quote, which only a comment may follow
+        end = value.find(value[0], 1)
+        if end > 0 and (not value[end + 1:].strip() or value[end + 1:].strip().startswith("#")):
+            return value[1:end]
+    elif " #" in value:
+        value = value.split(" #", 1)[0].rstrip()
+    lowered = value.lower()
+    if lowered in ("true", "yes"):
+        return True
+    if lowered in ("false", "no"):
+        return False
+    if lowered in ("null", "~"):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _plain(value):
+    # TOML dates and times become ISO strings, so fields can be saved as JSON
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
@@ -1,4 +1,7 @@
 class HTMLNode:
+    # No per-instance __dict__: documents hold tens of thousands of nodes
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,19 +11,29 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
 
+    def iter_html(self):
+        """
+        Yields the node's HTML as a sequence of string fragments.
+        """
+        yield self.to_html()
+
+    def write_html(self, writer):
+        """
+        Streams the node's HTML to a file-like object with a write method.
+        """
+        for fragment in self.iter_html():
+            writer.write(fragment)
+
     def props_to_html(self):
-        if self.props is None:
-            return ""
-        props_html = ""
-        for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
-        return props_html
+        return props_to_html(self.props)
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -36,18 +49,106 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        return render_html(self)
+
+    def iter_html(self):
+        """
+        Yields the node's HTML one child subtree at a time.
+        """
         if self.tag is None:
             raise ValueError("invalid HTML: no tag")
         if self.children is None:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
+        yield f"<{self.tag}{props_to_html(self.props)}>"
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            yield render_html(child)
+        yield f"</{self.tag}>"
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
+
+
+def render_html(node):
+    """
+    Returns the HTML of node and its descendants.
+    The tree is walked with an explicit stack of child iterators instead of
+    recursion, so deep nesting costs no Python frames and cannot hit the
+    recursion limit. Parents whose children are all leaves (paragraphs,
+    headings, list items) are rendered to one string without being pushed,
+    which keeps wide trees at least as fast as recursive rendering. All
+    fragments go into one list that is joined once. Nodes other than plain
+    LeafNodes and ParentNodes render through their own to_html().
+    """
+    if node.__class__ is not ParentNode:
+        return node.to_html()
+    fragments = []
+    append = fragments.append
+    parent_node = ParentNode
+    # (remaining children, closing tag) of every open parent
+    stack = []
+    child = node
+    while True:
+        if child is not None:
+            if child.tag is None:
+                raise ValueError("invalid HTML: no tag")
+            if child.children is None:
+                raise ValueError("invalid HTML: no children")
+            append(f"<{child.tag}{props_to_html(child.props)}>")
+            stack.append((iter(child.children), f"</{child.tag}>"))
+        children, closing_tag = stack[-1]
+        for child in children:
+            if child.__class__ is parent_node:
+                html = _leaf_parent_html(child)
+                if html is None:
+                    # Descend; this parent's remaining children resume afterwards
+                    break
+                append(html)
+            else:
+                append(child.to_html())
+        else:
+            append(closing_tag)
+            stack.pop()
+            if not stack:
+                return "".join(fragments)
+            child = None
+
+
+def _leaf_parent_html(node):
+    # The HTML of a ParentNode whose children are all LeafNodes, else None
+    if node.tag is None:
+        raise ValueError("invalid HTML: no tag")
+    if node.children is None:
+        raise ValueError("invalid HTML: no children")
+    html = ""
+    for child in node.children:
+        if child.__class__ is not LeafNode:
+            return None
+        if child.value is None:
+            raise ValueError("invalid HTML: no value")
+        if child.tag is None:
+            html += child.value
+        elif child.props:
+            html += f"<{child.tag}{props_to_html(child.props)}>{child.value}</{child.tag}>"
+        else:
+            html += f"<{child.tag}>{child.value}</{child.tag}>"
+    if node.props:
+        return f"<{node.tag}{props_to_html(node.props)}>{html}</{node.tag}>"
+    return f"<{node.tag}>{html}</{node.tag}>"
+
+
+def props_to_html(props):
+    """
+    Serializes an attribute dict as ' name="value"' pairs.
+    """
+    if not props:
+        return ""
+    props_html = ""
+    for prop in props:
+        props_html += f' {prop}="{props[prop]}"'
+    return props_html
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from assets import is_unchanged, sync_file
+from build_log import log
+from htmlnode import LeafNode, ParentNode
+from manifest import hash_file
+
+try:
+    from PIL import Image
+except ImportError:
+    # Optional dependency; without it no variants are generated, but images
+    # still get width, height and loading attributes
+    Image = None
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif")
+DEFAULT_WIDTHS = (480, 960, 1600)
+INDEX_FILE = "index.json"
+
+
+class ImagePipeline:
+    """
+    Generates resized, re-encoded variants of the images in static_dir and the
+    attributes that let browsers pick one: width, height, srcset and
+    loading="lazy".
+    A variant is generated for every width in widths that is smaller than the
+    image, on a thread pool (Pillow releases the GIL while resizing and
+    encoding). Variants are kept in cache_dir under the source's content hash,
+    so an unchanged image is never processed again, even after it is renamed,
+    and the cache index remembers each source's size and modification time so
+    unchanged sources are not even hashed.
+    Variants are copied next to their images in dest_dir, and variants no
+    longer produced are removed.
+    """
+
+    VERSION = 1
+
+    def __init__(self, static_dir, dest_dir, cache_dir, widths=DEFAULT_WIDTHS, workers=None):
+        self.static_dir = static_dir
+        self.dest_dir = dest_dir
+        self.cache_dir = cache_dir
+        self.widths = sorted(set(widths))
+        self.workers = workers
+        # {url: index entry}, see _process
+        self.entries = {}
+        # Variants written to dest_dir, relative to it
+        self.generated = []
+        self.processed = 0
+
+    def run(self):
+        """
+        Brings the variants in cache_dir and dest_dir up to date with the images
+        in static_dir. Returns the number of files written or removed in dest_dir.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index = self._load_index()
+        previous = index.get("entries", {})
+        jobs = []
+        for url, path in find_images(self.static_dir):
+            stat = os.stat(path)
+            entry = previous.get(url)
+            if entry is not None and (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+                digest = entry["hash"]
+            else:
+                digest = hash_file(path)
+            if entry is not None and entry["hash"] == digest and self._is_cached(entry):
+                self.entries[url] = {**entry, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                continue
+            jobs.append((url, path, digest, stat))
+
+        with ThreadPoolExecutor(max_workers=self.workers or os.cpu_count() or 1) as executor:
+            for url, entry in zip([job[0] for job in jobs], executor.map(self._process, jobs)):
+                self.entries[url] = entry
+        self.processed = len(jobs)
+
+        changed = 0
+        outputs = []
+        for url, entry in sorted(self.entries.items()):
+            for width, cache_name in entry["variants"]:
+                key = variant_url(url, width).lstrip("/")
+                outputs.append(key)
+                cache_file = os.path.join(self.cache_dir, cache_name)
+                dest_file = os.path.join(self.dest_dir, *key.split("/"))
+                if not is_unchanged(cache_file, dest_file):
+                    os.makedirs(os.path.dirname(dest_file), exist_ok=True)
+                    sync_file(cache_file, dest_file)
+                    log.debug("image_variant_written", f"Wrote image variant {dest_file}", path=dest_file)
+                    changed += 1
+        current = set(outputs)
+        for key in index.get("generated", []):
+            dest_file = os.path.join(self.dest_dir, *key.split("/"))
+            if key not in current and os.path.exists(dest_file):
+                os.remove(dest_file)
+                log.debug("image_variant_removed", f"Removed stale image variant {dest_file}", path=dest_file)
+                changed += 1
+        self.generated = outputs
+        self._save_index()
+        log.info(
+            "images",
+            f"Processed {self.processed} image(s), {len(self.entries) - self.processed} cached; "
+            f"{len(outputs)} variant(s) ({'Pillow' if Image is not None else 'no Pillow, sizes only'}).",
+            processed=self.processed,
+            variants=len(outputs),
+        )
+        return changed
+
+    def attributes(self):
+        """
+        Returns {url: {attribute: value}} with the img attributes of every image.
+        """
+        attributes = {}
+        for url, entry in self.entries.items():
+            if entry["width"] is None:
+                continue
+            props = {"width": str(entry["width"]), "height": str(entry["height"])}
+            if entry["variants"]:
+                candidates = [f"{variant_url(url, width)} {width}w" for width, _ in entry["variants"]]
+                candidates.append(f"{url} {entry['width']}w")
+                props["srcset"] = ", ".join(candidates)
+            attributes[url] = props
+        return attributes
+
+    def _process(self, job):
+        # Runs on the thread pool; returns the index entry of one image
+        url, path, digest, stat = job
+        size = image_size(path)
+        variants = []
+        if Image is not None:
+            with Image.open(path) as image:
+                size = image.size
+                extension = os.path.splitext(path)[1].lower()
+                for width in self.widths:
+                    if width >= size[0]:
+                        continue
+                    cache_name = f"{digest[:32]}-{width}w{extension}"
+                    cache_file = os.path.join(self.cache_dir, cache_name)
+                    if not os.path.exists(cache_file):
+                        _write_variant(image, width, cache_file)
+                    variants.append((width, cache_name))
+        log.debug("image_processed", f"Processed image {path}", path=path)
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": digest,
+            "width": size[0] if size else None,
+            "height": size[1] if size else None,
+            "widths": self.widths,
+            "resized": Image is not None,
+            "variants": variants,
+        }
+
+    def _is_cached(self, entry):
+        # An entry is reusable if it was made with the same widths and, if
+        # Pillow is available now, with Pillow, and its variants still exist
+        if entry.get("widths") != self.widths or (Image is not None and not entry.get("resized")):
+            return False
+        return all(os.path.exists(os.path.join(self.cache_dir, cache_name)) for _, cache_name in entry["variants"])
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_FILE), "r", encoding="utf-8") as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(index, dict) or index.get("version") != self.VERSION:
+            return {}
+        return index
+
+    def _save_index(self):
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        data = {"version": self.VERSION, "entries": self.entries, "generated": self.generated}
+        with open(f"{path}.tmp", "w", encoding="utf-8") as index_file:
+            json.dump(data, index_file, indent=2, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+
+
+def find_images(static_dir):
+    """
+    Returns the sorted (url, path) pairs of the images under static_dir.
+    """
+    images = []
+    for root, dirs, files in os.walk(static_dir):
+        dirs.sort()
+        for file_name in sorted(files):
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                path = os.path.join(root, file_name)
+                url = "/" + os.path.relpath(path, static_dir).replace(os.sep, "/")
+                images.append((url, path))
+    return images
+
+
+def variant_url(url, width):
+    """
+    Returns the URL of the variant of the image at url that is width pixels wide.
+    """
+    stem, extension = os.path.splitext(url)
+    return f"{stem}-{width}w{extension}"
+
+
+def annotate_images(node, images):
+    """
+    Adds loading="lazy" to every img node in the tree under node, and the
+    attributes of its image from images (see ImagePipeline.attributes).
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParentNode):
+            stack.extend(node.children)
+        elif isinstance(node, LeafNode) and node.tag == "img":
+            props = node.props if node.props is not None else {}
+            props.update(images.get(props.get("src"), {}))
+            props["loading"] = "lazy"
+            node.props = props
+
+
+def images_fingerprint(images):
+    """
+    Returns a hash of the image attributes, which pages depend on like they
+    depend on the template.
+    """
+    return hashlib.sha256(json.dumps(images, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def image_size(path):
+    """
+    Returns the (width, height) of a PNG, GIF or JPEG file read from its
+    header, or None if the format is not recognized.
+    """
+    with open(path, "rb") as image_file:
+        header = image_file.read(26)
+        if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+            return struct.unpack(">II", header[16:24])
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", header[6:10])
+        if header.startswith(b"\xff\xd8"):
+            image_file.seek(2)
+            return _jpeg_size(image_file)
+    return None
+
+
+def _jpeg_size(image_file):
+    # Walks the JPEG segments up to the start-of-frame marker holding the size
+    while True:
+        marker = image_file.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        length = image_file.read(2)
+        if len(length) < 2:
+            return None
+        (length,) = struct.unpack(">H", length)
+        if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+            data = image_file.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack(">HH", data[1:5])
+            return width, height
+        image_file.seek(length - 2, os.SEEK_CUR)
+
+
+def _write_variant(image, width, cache_file):
+    height = max(1, round(image.size[1] * width / image.size[0]))
+    resized = image.resize((width, height), Image.LANCZOS)
+    options = {"optimize": True}
+    if image.format == "JPEG":
+        options["quality"] = 82
+        options["progressive"] = True
+    tmp_file = f"{cache_file}.tmp"
+    resized.save(tmp_file, format=image.format, **options)
+    os.replace(tmp_file, cache_file)
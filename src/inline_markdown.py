@@ -3,16 +3,78 @@ import re
 from textnode import TextNode, TextType
 
 
+DELIMITER_PATTERN = re.compile(r"\*\*|_|`")
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+DELIMITER_TEXT_TYPES = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    """
+    Splits inline markdown into TextNodes in a single left-to-right scan.
+    Produces the same nodes as running split_nodes_delimiter for "**", "_"
+    and "`", then split_nodes_image and split_nodes_link, but visits each
+    character a constant number of times instead of rebuilding the node
+    list once per pass.
+    """
+    nodes = []
+    open_delimiter = None
+    start = 0
+    for match in DELIMITER_PATTERN.finditer(text):
+        delimiter = match.group()
+        if open_delimiter is None:
+            append_text_and_links(nodes, text[start:match.start()])
+            open_delimiter = delimiter
+        elif delimiter == open_delimiter:
+            section = text[start:match.start()]
+            if section != "":
+                nodes.append(TextNode(section, DELIMITER_TEXT_TYPES[delimiter]))
+            open_delimiter = None
+        elif open_delimiter == "**" or (open_delimiter == "_" and delimiter == "`"):
+            # Bold sections are never split further, and neither are
+            # italic sections by code delimiters
+            continue
+        else:
+            # The pass for the outer delimiter would see an odd number of
+            # inner delimiters in this section
+            raise ValueError("invalid markdown, formatted section not closed")
+        start = match.end()
+    if open_delimiter is not None:
+        raise ValueError("invalid markdown, formatted section not closed")
+    append_text_and_links(nodes, text[start:])
     return nodes
 
 
+def append_text_and_links(nodes, text):
+    """
+    Appends plain text to nodes, splitting out its images and then the links
+    in the text between them.
+    """
+    if text == "":
+        return
+    position = 0
+    for match in IMAGE_PATTERN.finditer(text):
+        append_text_and_matches(nodes, text[position:match.start()], LINK_PATTERN, TextType.LINK)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    append_text_and_matches(nodes, text[position:], LINK_PATTERN, TextType.LINK)
+
+
+def append_text_and_matches(nodes, text, pattern, text_type):
+    position = 0
+    for match in pattern.finditer(text):
+        if match.start() > position:
+            nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        position = match.end()
+    if position < len(text):
+        nodes.append(TextNode(text[position:], TextType.TEXT))
+
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for old_node in old_nodes:
@@ -35,66 +97,30 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
-            new_nodes.append(old_node)
-            continue
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(
-                TextNode(
-                    image[0],
-                    TextType.IMAGE,
-                    image[1],
-                )
-            )
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-    return new_nodes
+    return split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
 
 def split_nodes_link(old_nodes):
+    return split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
+
+
+def split_nodes_pattern(old_nodes, pattern, text_type):
+    """
+    Splits every text node at the matches of a precompiled image or link
+    pattern, slicing the text along the match spans in one pass.
+    """
     new_nodes = []
     for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
+        if old_node.text_type != TextType.TEXT or old_node.text == "":
             new_nodes.append(old_node)
             continue
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        append_text_and_matches(new_nodes, old_node.text, pattern, text_type)
     return new_nodes
 
 
 def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return LINK_PATTERN.findall(text)
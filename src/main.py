@@ -1,128 +1,259 @@
-from textnode import TextNode, TextType
-from markdown_blocks import markdown_to_html_node
+from manifest import BuildManifest
+from assets import LINK_MODES, prune_directory, sync_directory
+from block_cache import BlockCache
+from build_log import FORMATS, LEVELS, log
+from compress import COMPRESSORS, precompress_tree
+from images import DEFAULT_WIDTHS, ImagePipeline
+from pages import extract_title, generate_pages_recursive, resolve_workers
+from profiler import BuildProfiler, NULL_PROFILER
+from serve import DevServer
+from shards import SHARD_MANIFEST, merge_shards, shard_dir
+from site_index import SiteIndex
+from watch import SiteWatcher
+import argparse
 import os
 import sys
-import shutil
+
+
+MANIFEST_PATH = ".build-manifest.json"
+INDEX_PATH = ".site-index.json"
+SHARDS_DIR = "shards"
+IMAGE_CACHE_DIR = ".image-cache"
 
 
 def main():
-    # Default basepath to "/" if not provided
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    copy_directory("static", "docs")
-    generate_pages_recursive(
+    args = parse_args(sys.argv[1:])
+    # Text and JSON logs default to every event, the summary to totals only
+    level = args.log_level or ("info" if args.log_format == "summary" else "debug")
+    log.configure(level, args.log_format)
+    try:
+        build(args)
+    finally:
+        log.close()
+
+
+def build(args):
+    profiler = BuildProfiler() if args.profile or args.profile_json else NULL_PROFILER
+    block_cache = None
+    if args.block_cache or args.block_cache_dir:
+        block_cache = BlockCache(args.block_cache_size, args.block_cache_dir)
+    if args.serve is not None:
+        # Pages are rendered on request, so there is nothing to build up front
+        DevServer("content", "static", "template.html", args.basepath, block_cache).serve(port=args.serve)
+        return
+    if args.shard_count is not None:
+        # Only this shard's pages are built; --merge-shards assembles docs/
+        build_shard(args, profiler, block_cache)
+        report_profile(args, profiler, block_cache)
+        return
+    if args.incremental:
+        # Keep existing outputs; the manifest decides what needs re-rendering
+        manifest = BuildManifest.load(MANIFEST_PATH)
+    else:
+        # A full build renders every page but still records a manifest for the
+        # next incremental run
+        manifest = BuildManifest()
+    site_index = None
+    if args.site_index:
+        # An incremental build updates the saved index in place
+        site_index = SiteIndex.load(INDEX_PATH, "docs") if args.incremental else SiteIndex("docs")
+    with profiler.stage("static_sync"):
+        copied, _, removed = sync_directory("static", "docs", manifest, args.hash_assets, args.link_assets)
+    changed = copied + removed
+    pipeline = None
+    images = None
+    generated = []
+    if args.images:
+        pipeline = ImagePipeline("static", "docs", IMAGE_CACHE_DIR, args.image_widths, resolve_workers(args.workers))
+        with profiler.stage("images"):
+            changed += pipeline.run()
+        images = pipeline.attributes()
+        generated += [os.path.join("docs", *key.split("/")) for key in pipeline.generated]
+    if args.merge_shards is not None:
+        shard_dirs = [shard_dir(SHARDS_DIR, index) for index in range(args.merge_shards)]
+        with profiler.stage("merge_shards"):
+            outputs, merged, stale = merge_shards(shard_dirs, "docs", manifest, args.link_assets)
+        changed += len(merged) + stale
+        if site_index is not None:
+            with profiler.stage("site_index"):
+                site_index.refresh(outputs, merged)
+    else:
+        changed += generate_pages_recursive(
+            "content/",
+            "template.html",
+            "docs/",
+            args.basepath,
+            manifest=manifest,
+            workers=resolve_workers(args.workers),
+            profiler=profiler,
+            block_cache=block_cache,
+            io_depth=args.io_depth,
+            site_index=site_index,
+            drafts=args.drafts,
+            images=images,
+        )
+    if site_index is not None:
+        with profiler.stage("index_pages"):
+            changed += site_index.write_pages("template.html", args.basepath, args.site_url)
+        site_index.save(INDEX_PATH)
+        generated += [os.path.join("docs", *key.split("/")) for key in site_index.generated]
+    if not args.incremental:
+        # Unchanged outputs are left in place rather than deleting docs/ up
+        # front, so only files no longer produced by the build are removed
+        changed += prune_directory("docs", manifest, tuple(COMPRESSORS) if args.precompress else (), generated)
+    manifest.save(MANIFEST_PATH)
+    log.info("build_changed", f"Changed {changed} file(s) in 'docs'.", changed=changed)
+
+    if args.precompress:
+        with profiler.stage("precompress"):
+            precompress_tree("docs")
+
+    report_profile(args, profiler, block_cache)
+
+    if args.watch:
+        watcher = SiteWatcher(
+            "content",
+            "static",
+            "template.html",
+            "docs",
+            args.basepath,
+            manifest,
+            block_cache,
+            args.drafts,
+            COMPRESSORS if args.precompress else None,
+            pipeline,
+            site_index,
+            args.site_url,
+        )
+        watcher.run(on_rebuild=lambda actions: save_state(manifest, site_index))
+
+
+def save_state(manifest, site_index):
+    manifest.save(MANIFEST_PATH)
+    if site_index is not None:
+        site_index.save(INDEX_PATH)
+
+
+def build_shard(args, profiler, block_cache):
+    """
+    Renders this shard's share of the pages (see shard_pages) into its own
+    directory under SHARDS_DIR, next to the manifest merge_shards reads.
+    Static files, index pages and precompression are left to the merge.
+    """
+    directory = shard_dir(SHARDS_DIR, args.shard_index)
+    manifest_path = os.path.join(directory, SHARD_MANIFEST)
+    manifest = BuildManifest.load(manifest_path) if args.incremental else BuildManifest()
+    changed = generate_pages_recursive(
         "content/",
         "template.html",
-        "docs/",
-        basepath
+        directory,
+        args.basepath,
+        manifest=manifest,
+        workers=resolve_workers(args.workers),
+        profiler=profiler,
+        block_cache=block_cache,
+        io_depth=args.io_depth,
+        drafts=args.drafts,
+        shard=(args.shard_index, args.shard_count),
     )
+    if not args.incremental:
+        changed += prune_directory(directory, manifest)
+    manifest.save(manifest_path)
+    log.info("build_changed", f"Changed {changed} file(s) in '{directory}'.", changed=changed)
 
 
-def copy_directory(source, destination):
-    """
-    Recursively copies all contents from the source directory to the destination directory.
-    Deletes all contents of the destination directory before copying.
-    Logs each file and directory being copied.
-    """
-    # Ensure the source directory exists
-    if not os.path.exists(source):
-        raise FileNotFoundError(f"Source directory '{source}' does not exist.")
-
-    # Delete all contents of the destination directory
-    if os.path.exists(destination):
-        shutil.rmtree(destination)
-        print(f"Deleted all contents of '{destination}'.")
-
-    # Recreate the destination directory
-    os.makedirs(destination)
-    print(f"Created destination directory '{destination}'.")
-
-    # Walk through the source directory
-    for root, dirs, files in os.walk(source):
-        # Compute the relative path from the source directory
-        relative_path = os.path.relpath(root, source)
-        # Compute the corresponding destination path
-        dest_path = os.path.join(destination, relative_path)
-
-        # Create directories in the destination
-        for dir_name in dirs:
-            dir_path = os.path.join(dest_path, dir_name)
-            os.makedirs(dir_path, exist_ok=True)
-            print(f"Created directory: {dir_path}")
-
-        # Copy files to the destination
-        for file_name in files:
-            src_file = os.path.join(root, file_name)
-            dest_file = os.path.join(dest_path, file_name)
-            shutil.copy2(src_file, dest_file)
-            print(f"Copied file: {src_file} -> {dest_file}")
-
-def extract_title(markdown):
-    """
-    Extracts the title from the markdown content.
-    The title is expected to be the first line of the markdown.
-    """
-    if len(markdown.strip()) == 0:
-        raise Exception("Markdown content is empty")
-    lines = markdown.split("\n")
-    if len(lines) == 0:
-        raise Exception("Markdown content is empty")
-    return lines[0].strip("# ").strip()
-
-def generate_page(from_path, template_path, dest_path, base_path):
-    """
-    Reads content from the source file (from_path) and the template file (template_path),
-    and prepares to generate the final page at the destination (dest_path).
-    """
-    # Read content from the source file
-    with open(from_path, "r", encoding="utf-8") as from_file:
-        from_content = from_file.read()
-        print(f"Read content from {from_path}")
-
-    # Read content from the template file
-    with open(template_path, "r", encoding="utf-8") as template_file:
-        template_content = template_file.read()
-        print(f"Read content from {template_path}")
-
-    html = markdown_to_html_node(from_content).to_html()
-    title = extract_title(from_content)
-    
-    # Replace placeholders in the template with actual content
-    html = template_content.replace("{{ Content }}", html)
-    html = html.replace("{{ Title }}", title)
-    html = html.replace("href=\"/", f"href=\"{base_path}")
-    html = html.replace("src=\"/", f"src=\"{base_path}")
-    # Write the final HTML to the destination file
-    with open(dest_path, "w", encoding="utf-8") as dest_file:
-        dest_file.write(html)
-        print(f"Wrote content to {dest_path}")
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path):
-    """
-    Recursively generates pages from markdown files in the source directory (from_path)
-    using the template file (template_path) and saves them to the destination directory (dest_path).
-    """
-    # Ensure the destination directory exists
-    os.makedirs(dest_dir_path, exist_ok=True)
-    print(f"Created destination directory '{dest_dir_path}'.")
-
-    # Walk through the source directory
-    for root, dirs, files in os.walk(dir_path_content):
-        # Compute the relative path from the source directory
-        relative_path = os.path.relpath(root, dir_path_content)
-        # Compute the corresponding destination path
-        dest_path = os.path.join(dest_dir_path, relative_path)
-
-        # Create directories in the destination
-        for dir_name in dirs:
-            dir_path = os.path.join(dest_path, dir_name)
-            os.makedirs(dir_path, exist_ok=True)
-            print(f"Created directory: {dir_path}")
-
-        # Process markdown files
-        for file_name in files:
-            if file_name.endswith(".md"):
-                src_file = os.path.join(root, file_name)
-                dest_file = os.path.join(dest_path, file_name.replace(".md", ".html"))
-                generate_page(src_file, template_path, dest_file, base_path)
-
-main()
+def report_profile(args, profiler, block_cache):
+    if block_cache is not None:
+        profiler.count("block_cache_hits", block_cache.hits + block_cache.disk_hits)
+        profiler.count("block_cache_misses", block_cache.misses)
+    if args.profile:
+        log.info("profile", profiler.format_summary())
+    if args.profile_json:
+        profiler.write_json(args.profile_json)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Build the static site into docs/.")
+    # Default basepath to "/" if not provided
+    parser.add_argument("basepath", nargs="?", default="/",
+                        help="path prefix for root-relative links (default: /)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-render pages whose source, template or base path changed")
+    parser.add_argument("--hash-assets", action="store_true",
+                        help="compare static files by content hash, not just size and modification time")
+    parser.add_argument("--link-assets", choices=LINK_MODES, default="copy",
+                        help="hard link or reflink static files into docs/ instead of copying them where supported")
+    parser.add_argument("--watch", action="store_true",
+                        help="after building, keep rebuilding affected outputs as content/, static/ and template.html change")
+    parser.add_argument("--serve", type=int, nargs="?", const=8888, metavar="PORT",
+                        help="instead of building docs/, serve the site on PORT (default: 8888), rendering pages on request")
+    parser.add_argument("--site-index", action="store_true",
+                        help="also generate section listings, tag pages and an Atom feed (feed.xml) from page metadata")
+    parser.add_argument("--site-url", default="", metavar="URL",
+                        help="absolute site URL the Atom feed links to; without it no feed.xml is written")
+    parser.add_argument("--drafts", action="store_true",
+                        help="also build pages marked \"draft: true\" in their front matter")
+    parser.add_argument("--images", action="store_true",
+                        help="write resized variants of static images (with Pillow) and add width, height, srcset "
+                             "and loading=\"lazy\" to img tags")
+    parser.add_argument("--image-widths", type=_widths, default=DEFAULT_WIDTHS, metavar="W,W,...",
+                        help=f"widths of the image variants in pixels (default: {','.join(map(str, DEFAULT_WIDTHS))})")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz (and .br, if the brotli module is installed) siblings of changed HTML and CSS files")
+    parser.add_argument("--profile", action="store_true",
+                        help="print per-stage timings and the slowest pages after the build")
+    parser.add_argument("--profile-json", metavar="PATH",
+                        help="write the build profile as JSON to PATH")
+    parser.add_argument("--block-cache", action="store_true",
+                        help="reuse the rendered HTML of blocks that appear more than once")
+    parser.add_argument("--block-cache-size", type=int, default=4096,
+                        help="blocks kept in memory by the block cache (default: 4096)")
+    parser.add_argument("--block-cache-dir", metavar="DIR",
+                        help="also keep rendered blocks in DIR across builds (implies --block-cache)")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of processes rendering pages in parallel, 0 for one per CPU core (default: 1)")
+    parser.add_argument("--io-depth", type=int, default=0, metavar="N",
+                        help="in a serial build, read up to N pages ahead and write pages in the background (default: 0, off)")
+    parser.add_argument("--shard-index", type=int, metavar="I",
+                        help="build only shard I (counting from 0) of the pages into shards/I/, for --merge-shards")
+    parser.add_argument("--shard-count", type=int, metavar="N",
+                        help="number of shards the pages are split into, balanced by source size")
+    parser.add_argument("--merge-shards", type=int, metavar="N",
+                        help="instead of rendering pages, combine the pages built by shards 0..N-1 into docs/")
+    parser.add_argument("--log-format", choices=FORMATS, default="summary",
+                        help="summary: totals and one line of event counts; text: a line per event; "
+                             "json: a JSON object per event, with per-file durations (default: summary)")
+    parser.add_argument("--log-level", choices=LEVELS,
+                        help="least severe events to print (default: info for the summary, debug otherwise)")
+    args = parser.parse_args(argv)
+    if args.workers < 0:
+        parser.error(f"invalid worker count: {args.workers}")
+    if args.block_cache_size < 1:
+        parser.error(f"invalid block cache size: {args.block_cache_size}")
+    if (args.shard_index is None) != (args.shard_count is None):
+        parser.error("--shard-index and --shard-count must be given together")
+    if args.shard_count is not None:
+        if args.shard_count < 1 or not 0 <= args.shard_index < args.shard_count:
+            parser.error(f"invalid shard: {args.shard_index} of {args.shard_count}")
+        if args.merge_shards is not None or args.watch or args.serve is not None or args.images:
+            parser.error("--shard-index cannot be combined with --merge-shards, --watch, --serve or --images")
+    if args.merge_shards is not None and args.merge_shards < 1:
+        parser.error(f"invalid shard count: {args.merge_shards}")
+    if args.merge_shards is not None and args.images:
+        # Shards render their pages without the image attributes
+        parser.error("--merge-shards cannot be combined with --images")
+    return args
+
+
+def _widths(value):
+    try:
+        widths = [int(width) for width in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid widths: {value}")
+    if not widths or min(widths) < 1:
+        raise argparse.ArgumentTypeError(f"invalid widths: {value}")
+    return widths
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+
+
+class BuildManifest:
+    """
+    On-disk record of the inputs each generated page was built from.
+    Maps an output path to its source path, the source content hash,
+    the template hash (which also covers the renderer's code, see
+    page_template_hash) and the base path used to render it.
+    Also records the static assets synced into the output directory, so
+    assets removed from the source can be removed from the output.
+    """
+
+    VERSION = 1
+
+    def __init__(self, pages=None, assets=None):
+        self.pages = pages if pages is not None else {}
+        self.assets = assets if assets is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a manifest from disk. A missing, unreadable or outdated
+        manifest yields an empty one, which forces a full rebuild.
+        """
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, "r", encoding="utf-8") as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            return cls()
+        return cls(data.get("pages", {}), data.get("assets", {}))
+
+    def save(self, path):
+        """
+        Writes the manifest to disk, replacing the previous one atomically.
+        """
+        data = {"version": self.VERSION, "pages": self.pages, "assets": self.assets}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(data, manifest_file, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def is_current(self, output, source_hash, template_hash, base_path):
+        """
+        Returns True if the output exists and was rendered from exactly these inputs.
+        """
+        entry = self.pages.get(_key(output))
+        if entry is None or not os.path.exists(output):
+            return False
+        return (
+            entry["source_hash"] == source_hash
+            and entry["template_hash"] == template_hash
+            and entry["base_path"] == base_path
+        )
+
+    def record(self, output, source, source_hash, template_hash, base_path):
+        self.pages[_key(output)] = {
+            "source": _key(source),
+            "source_hash": source_hash,
+            "template_hash": template_hash,
+            "base_path": base_path,
+        }
+
+    def forget(self, output):
+        self.pages.pop(_key(output), None)
+
+    def stale_outputs(self, outputs):
+        """
+        Returns the recorded outputs that are not in the given collection,
+        i.e. pages whose sources have been removed since the last build.
+        """
+        return _missing(self.pages, outputs)
+
+    def record_asset(self, output, source, size, mtime_ns):
+        self.assets[_key(output)] = {
+            "source": _key(source),
+            "size": size,
+            "mtime_ns": mtime_ns,
+        }
+
+    def forget_asset(self, output):
+        self.assets.pop(_key(output), None)
+
+    def knows(self, output):
+        """
+        Returns True if output is a recorded page or asset.
+        """
+        key = _key(output)
+        return key in self.pages or key in self.assets
+
+    def stale_assets(self, outputs):
+        """
+        Returns the recorded assets that are not in the given collection.
+        """
+        return _missing(self.assets, outputs)
+
+
+def hash_file(path):
+    """
+    Returns the hex SHA-256 digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _missing(entries, outputs):
+    current = {_key(output) for output in outputs}
+    return sorted(output for output in entries if output not in current)
+
+
+def _key(path):
+    return os.path.normpath(path).replace(os.sep, "/")
@@ -1,6 +1,8 @@
 from enum import Enum
+import io
 
-from htmlnode import ParentNode
+from htmlnode import LeafNode, ParentNode
+from images import annotate_images
 from inline_markdown import text_to_textnodes
 from textnode import text_node_to_html_node, TextNode, TextType
 
@@ -14,35 +16,125 @@ class BlockType(Enum):
     ULIST = "unordered_list"
 
 
-def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+
+
+class Block:
+    """
+    A stripped markdown block with its type and the 1-based line range it spans.
+    """
+
+    __slots__ = ("text", "block_type", "start_line", "end_line")
+
+    def __init__(self, text, block_type, start_line, end_line):
+        self.text = text
+        self.block_type = block_type
+        self.start_line = start_line
+        self.end_line = end_line
+
+    def __eq__(self, other):
+        return (
+            self.text == other.text
+            and self.block_type == other.block_type
+            and self.start_line == other.start_line
+            and self.end_line == other.end_line
+        )
+
+    def __repr__(self):
+        return f"Block({self.block_type.value}, lines {self.start_line}-{self.end_line}, {self.text!r})"
+
+
+def iter_blocks(lines):
+    """
+    Lexes markdown given as an iterable of lines that keep their line endings
+    (such as an open file) into Blocks.
+    Each line is read once; blank lines end a block, which is then stripped and
+    typed from the lines already in hand. The result matches markdown_to_blocks
+    and block_to_block_type, without ever holding the whole document.
+    """
+    block_lines = []
+    start_line = 0
+    number = 0
+    seen_content = False
+    # Newlines since the last non-blank line's text
+    trailing_newlines = 0
+    for number, line in enumerate(lines, 1):
+        ends_line = line.endswith("\n")
+        if ends_line:
+            line = line[:-1]
+        if line == "":
+            trailing_newlines += ends_line
+            if block_lines:
+                yield finish_block(block_lines, start_line)
+                block_lines = []
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+        seen_content = True
+        trailing_newlines = int(ends_line)
+        if not block_lines:
+            start_line = number
+        block_lines.append(line)
+    if block_lines:
+        yield finish_block(block_lines, start_line)
+    # Splitting on "\n\n" leaves the odd newline of a trailing run as a
+    # whitespace-only, hence empty, block of its own
+    if trailing_newlines % 2 == 1 and (trailing_newlines >= 3 or not seen_content):
+        yield Block("", BlockType.PARAGRAPH, number, number)
+
+
+def finish_block(lines, start_line):
+    """
+    Builds the Block for a run of non-blank lines starting at start_line,
+    stripping it the way str.strip() would strip the joined text.
+    """
+    first = 0
+    last = len(lines) - 1
+    while first <= last and lines[first].isspace():
+        first += 1
+    while last >= first and lines[last].isspace():
+        last -= 1
+    if first > last:
+        return Block("", BlockType.PARAGRAPH, start_line, start_line + len(lines) - 1)
+    lines = lines[first : last + 1]
+    if len(lines) == 1:
+        lines[0] = lines[0].strip()
+    else:
+        lines[0] = lines[0].lstrip()
+        lines[-1] = lines[-1].rstrip()
+    return Block("\n".join(lines), lines_to_block_type(lines), start_line + first, start_line + last)
+
+
+def lex_blocks(markdown):
+    """
+    Returns the Blocks of a markdown string.
+    """
+    return list(iter_blocks(io.StringIO(markdown, newline="\n")))
+
+
+def markdown_to_blocks(markdown):
+    return [block.text for block in lex_blocks(markdown)]
 
 
 def block_to_block_type(block):
-    lines = block.split("\n")
+    return lines_to_block_type(block.split("\n"))
+
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+def lines_to_block_type(lines):
+    first_line = lines[0]
+    if first_line.startswith(HEADING_PREFIXES):
         return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+    if len(lines) > 1 and first_line.startswith("```") and lines[-1].startswith("```"):
         return BlockType.CODE
-    if block.startswith(">"):
+    if first_line.startswith(">"):
         for line in lines:
             if not line.startswith(">"):
                 return BlockType.PARAGRAPH
         return BlockType.QUOTE
-    if block.startswith("- "):
+    if first_line.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
                 return BlockType.PARAGRAPH
         return BlockType.ULIST
-    if block.startswith("1. "):
+    if first_line.startswith("1. "):
         i = 1
         for line in lines:
             if not line.startswith(f"{i}. "):
@@ -52,17 +144,61 @@ def block_to_block_type(block):
     return BlockType.PARAGRAPH
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+def markdown_to_html_node(markdown, cache=None, images=None):
+    """
+    Parses markdown into a div of block nodes.
+    With a BlockCache, each block is rendered to HTML once and reused wherever
+    the same block text appears again; cached blocks become raw LeafNodes.
+    With images (see ImagePipeline.attributes), img nodes get the attributes
+    of their image and loading="lazy"; blocks with images bypass the cache.
+    """
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+    for block in lex_blocks(markdown):
+        if cache is None or _has_images(block, images):
+            children.append(_block_node(block, images))
+            continue
+        html = cache.get(block.text)
+        if html is None:
+            html = block_to_html_node(block.text, block.block_type).to_html()
+            cache.put(block.text, html)
+        children.append(LeafNode(None, html))
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def iter_blocks_html(blocks, cache=None, images=None):
+    """
+    Yields the HTML of a stream of Blocks (see iter_blocks) fragment by fragment,
+    producing the same markup as markdown_to_html_node(...).to_html() while only
+    one block is in memory at a time.
+    """
+    yield "<div>"
+    for block in blocks:
+        if cache is None or _has_images(block, images):
+            yield from _block_node(block, images).iter_html()
+            continue
+        html = cache.get(block.text)
+        if html is None:
+            html = block_to_html_node(block.text, block.block_type).to_html()
+            cache.put(block.text, html)
+        yield html
+    yield "</div>"
+
+
+def _block_node(block, images):
+    node = block_to_html_node(block.text, block.block_type)
+    if images is not None:
+        annotate_images(node, images)
+    return node
+
+
+def _has_images(block, images):
+    # Cached HTML does not depend on the image attributes
+    return images is not None and "![" in block.text
+
+
+def block_to_html_node(block, block_type=None):
+    if block_type is None:
+        block_type = block_to_block_type(block)
     if block_type == BlockType.PARAGRAPH:
         return paragraph_to_html_node(block)
     if block_type == BlockType.HEADING:
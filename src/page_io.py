@@ -0,0 +1,221 @@
+import collections
+import contextlib
+import mmap
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8") as source_file:
+        return source_file.read()
+
+
+# Sources at least this large are read through mmap
+MMAP_THRESHOLD = 1 << 20
+
+
+@contextlib.contextmanager
+def open_source_lines(path, mmap_threshold=None):
+    """
+    Opens a UTF-8 markdown file as an iterator of lines that keep their "\n",
+    like a file opened in text mode.
+    Files of at least mmap_threshold (default: MMAP_THRESHOLD) bytes are
+    memory-mapped instead of read:
+    lines are found by searching the mapping, blank lines are produced without
+    decoding anything, and other lines are decoded straight from a memoryview
+    of the mapping, so the file is never copied into one large string.
+    Files containing "\r" are read in text mode, which translates line endings.
+    """
+    if mmap_threshold is None:
+        mmap_threshold = MMAP_THRESHOLD
+    with open(path, "rb") as source_file:
+        size = os.fstat(source_file.fileno()).st_size
+        if size < max(mmap_threshold, 1):
+            with open(path, "r", encoding="utf-8") as text_file:
+                yield text_file
+            return
+        with mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            if mapping.find(b"\r") != -1:
+                with open(path, "r", encoding="utf-8") as text_file:
+                    yield text_file
+                return
+            view = memoryview(mapping)
+            try:
+                lines = _mapped_lines(mapping, view, size)
+                yield lines
+                # Drop the generator's reference to the view before releasing it
+                lines.close()
+            finally:
+                view.release()
+
+
+def _mapped_lines(mapping, view, size):
+    position = 0
+    while position < size:
+        end = mapping.find(b"\n", position)
+        if end == position:
+            yield "\n"
+            position += 1
+            continue
+        end = size if end == -1 else end + 1
+        yield str(view[position:end], "utf-8")
+        position = end
+
+
+def write_page(dest_path, fragments):
+    """
+    Writes the string fragments to dest_path without joining them first.
+    The fragments are compared with the existing file as they arrive, and an
+    identical page is left untouched, keeping its modification time; writing
+    only starts at the first difference. A changed page is written to a
+    temporary file and moved into place, so a failed render never leaves a
+    truncated page behind.
+    Returns True if the page was written, False if it was already up to date.
+    """
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        existing = open(dest_path, "rb")
+    except FileNotFoundError:
+        existing = None
+    tmp_file = None
+    matched = 0
+    try:
+        for fragment in fragments:
+            data = fragment.encode("utf-8")
+            if tmp_file is None:
+                if existing is not None and existing.read(len(data)) == data:
+                    matched += len(data)
+                    continue
+                tmp_file = _start_rewrite(tmp_path, existing, matched)
+            tmp_file.write(data)
+        if tmp_file is None:
+            if existing is not None and existing.read(1) == b"":
+                return False
+            tmp_file = _start_rewrite(tmp_path, existing, matched)
+        tmp_file.close()
+        os.replace(tmp_path, dest_path)
+        return True
+    except BaseException:
+        if tmp_file is not None:
+            tmp_file.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise
+    finally:
+        if existing is not None:
+            existing.close()
+
+
+def _start_rewrite(tmp_path, existing, matched):
+    # Opens the temporary file, seeded with the prefix already known to match
+    tmp_file = open(tmp_path, "wb")
+    if matched:
+        existing.seek(0)
+        while matched:
+            chunk = existing.read(min(matched, 65536))
+            tmp_file.write(chunk)
+            matched -= len(chunk)
+    return tmp_file
+
+
+def prefetch(paths, depth=16, workers=4):
+    """
+    Yields a (path, text) pair for each path, in order, while a thread pool
+    reads up to depth files ahead, so the caller rarely waits on disk.
+    A file that cannot be read raises when its turn comes, as a plain read would.
+    """
+    if depth < 1:
+        raise ValueError(f"invalid prefetch depth: {depth}")
+    paths = iter(paths)
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for path in paths:
+            pending.append((path, executor.submit(read_text, path)))
+            if len(pending) == depth:
+                break
+        while pending:
+            path, future = pending.popleft()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(read_text, next_path)))
+            yield path, future.result()
+
+
+class PageWriter:
+    """
+    Writes rendered pages on a background thread.
+    write() queues a page and returns at once, blocking only while max_pending
+    pages are already waiting. The thread takes up to batch_size queued pages
+    at a time and writes them with write_page, so every page still lands
+    atomically, and pages identical to the existing file are skipped (counted
+    in unchanged). The first failed write is raised by the next write() or by close().
+    """
+
+    def __init__(self, max_pending=64, batch_size=16):
+        if max_pending < 1 or batch_size < 1:
+            raise ValueError(f"invalid page writer limits: {max_pending}, {batch_size}")
+        self.queue = queue.Queue(max_pending)
+        self.batch_size = batch_size
+        self.written = 0
+        self.unchanged = 0
+        self.batches = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="page-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, dest_path, html):
+        self._raise_error()
+        self.queue.put((dest_path, html))
+
+    def close(self):
+        """
+        Waits until every queued page is written.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+            return
+        # Already failing: flush what was queued, but keep the original error
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = batch[-1] is None
+            if done:
+                batch.pop()
+            if batch:
+                self.batches += 1
+            for dest_path, html in batch:
+                if self.error is not None:
+                    continue
+                try:
+                    if write_page(dest_path, [html]):
+                        self.written += 1
+                    else:
+                        self.unchanged += 1
+                except BaseException as e:
+                    self.error = e
+            if done:
+                return
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
@@ -0,0 +1,510 @@
+from block_cache import PARSER_MODULES, parser_fingerprint
+from build_log import log
+from front_matter import is_draft, read_fields, split_title
+from markdown_blocks import iter_blocks, iter_blocks_html
+from images import images_fingerprint
+from manifest import hash_file
+from page_io import PageWriter, open_source_lines, prefetch, write_page
+from profiler import BuildProfiler, NULL_PROFILER
+from template import load_template
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
+import hashlib
+import heapq
+import io
+import os
+import time
+
+
+# Modules whose code, besides the parser's, determines a rendered page
+RENDERER_MODULES = PARSER_MODULES + ("front_matter.py", "images.py", "template.py", "pages.py")
+
+
+def extract_title(markdown):
+    """
+    Extracts the title from the markdown content.
+    The title is expected to be the first line of the markdown.
+    """
+    if len(markdown.strip()) == 0:
+        raise Exception("Markdown content is empty")
+    lines = markdown.split("\n")
+    if len(lines) == 0:
+        raise Exception("Markdown content is empty")
+    return lines[0].strip("# ").strip()
+
+def generate_page(from_path, template_path, dest_path, base_path, template=None, profiler=NULL_PROFILER,
+                  block_cache=None, source=None, writer=None, images=None):
+    """
+    Reads content from the source file (from_path), renders it into the template
+    and writes the final page to the destination (dest_path).
+    Pass a compiled template to avoid reading template_path again for every page.
+    The markdown is lexed straight from the open (or, if large, memory-mapped)
+    file and the filled-in template streamed to the destination, so only one
+    block is in memory at a time.
+    A profiler times the read (opening the source), front_matter, parse,
+    to_html, template and write stages of the stream.
+    Front matter (see split_title) is left out of the page; its "title"
+    field, if any, is used instead of the first line.
+    A block_cache (see BlockCache) skips parsing blocks rendered before.
+    images (see ImagePipeline.attributes) adds the attributes of each image,
+    and loading="lazy", to the page's img tags.
+    source is the already read markdown of from_path, e.g. from prefetch, and
+    a writer (see PageWriter) takes the rendered page instead of it being
+    written here.
+    Returns True if the page was written, False if the destination already held
+    the same page and was left untouched, or None when it was left to writer.
+    """
+    start = time.perf_counter()
+    with profiler.page(from_path), contextlib.ExitStack() as stack:
+        with profiler.stage("read"):
+            lines = stack.enter_context(_open_source(from_path, source))
+        log.debug("page_read", f"Read content from {from_path}", path=from_path)
+        template = _compile_template(template, template_path, base_path, profiler)
+        with profiler.stage("front_matter"):
+            _, title, lines = split_title(lines)
+        # The stages below run interleaved as write_page pulls fragments through
+        # them, so each block's lexing, rendering and templating is timed as it happens
+        blocks = profiler.iterate("parse", _require_content(iter_blocks(lines)))
+        html = profiler.iterate("to_html", iter_blocks_html(blocks, block_cache, images))
+        fragments = profiler.iterate("template", template.iter_render(Content=html, Title=title))
+        with profiler.stage("write"):
+            changed = _write(dest_path, fragments, writer)
+    return _log_write(dest_path, changed, start)
+
+
+def _write(dest_path, fragments, writer):
+    if writer is None:
+        return write_page(dest_path, fragments)
+    writer.write(dest_path, "".join(fragments))
+    return None
+
+
+def _log_write(dest_path, changed, start):
+    duration_ms = (time.perf_counter() - start) * 1000
+    if changed is False:
+        log.debug("page_unchanged", f"Unchanged content in {dest_path}", path=dest_path, duration_ms=duration_ms)
+    elif changed is None:
+        log.debug("page_rendered", f"Rendered content for {dest_path}", path=dest_path, duration_ms=duration_ms)
+    else:
+        log.debug("page_written", f"Wrote content to {dest_path}", path=dest_path, duration_ms=duration_ms)
+    return changed
+
+
+def _open_source(from_path, source):
+    if source is None:
+        return open_source_lines(from_path)
+    # Prefetched text has had its line endings translated like a file read
+    return io.StringIO(source, newline="\n")
+
+
+def _compile_template(template, template_path, base_path, profiler):
+    # Compiles the template file unless the caller already did
+    if template is None:
+        with profiler.stage("template_load"):
+            template = load_template(template_path, base_path)
+        log.debug("template_read", f"Read content from {template_path}", path=template_path)
+    return template
+
+
+def _require_content(blocks):
+    # Passes the blocks through, raising like extract_title once they turn out
+    # to be whitespace only
+    empty = True
+    for block in blocks:
+        empty = empty and block.text == ""
+        yield block
+    if empty:
+        raise Exception("Markdown content is empty")
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path, manifest=None, workers=1,
+                             profiler=NULL_PROFILER, block_cache=None, io_depth=0, site_index=None,
+                             drafts=False, shard=None, images=None):
+    """
+    Recursively generates pages from markdown files in the source directory (from_path)
+    using the template file (template_path) and saves them to the destination directory (dest_path).
+    When a manifest is given, pages whose inputs are unchanged since the last build are skipped,
+    and outputs whose sources were removed are deleted.
+    With workers > 1 the pages are rendered in parallel, and with io_depth > 0
+    they are read ahead and written in the background (see generate_pages).
+    A site_index (see SiteIndex) is updated with the metadata of the rendered
+    pages and of any page it does not know yet.
+    Pages marked "draft: true" in their front matter are left out (and their
+    outputs removed like those of deleted sources) unless drafts is True.
+    With shard, an (index, count) pair, only that shard's share of the pages
+    is built (see shard_pages); pages of other shards count as removed.
+    images are the img attributes passed on to generate_page.
+    Returns the number of pages written or removed.
+    """
+    template_hash = page_template_hash(template_path, images) if manifest is not None else None
+    with profiler.stage("discover"):
+        pending, outputs, skipped = find_pages(
+            dir_path_content, dest_dir_path, base_path, manifest, template_hash, drafts, shard
+        )
+
+    written = generate_pages(
+        [(src_file, dest_file) for src_file, dest_file, _ in pending],
+        template_path,
+        base_path,
+        workers,
+        profiler,
+        block_cache,
+        io_depth,
+        images,
+    )
+
+    if site_index is not None:
+        with profiler.stage("site_index"):
+            site_index.refresh(outputs, [(src_file, dest_file) for src_file, dest_file, _ in pending])
+
+    if manifest is None:
+        return written
+    for src_file, dest_file, source_hash in pending:
+        manifest.record(dest_file, src_file, source_hash, template_hash, base_path)
+    if skipped:
+        log.info("pages_skipped", f"Skipped {skipped} unchanged page(s).", skipped=skipped)
+    # Remove pages whose markdown sources no longer exist
+    for stale_file in manifest.stale_outputs(outputs):
+        if os.path.exists(stale_file):
+            os.remove(stale_file)
+            log.debug("page_removed", f"Removed stale page: {stale_file}", path=stale_file)
+            remove_empty_dirs(os.path.dirname(stale_file), dest_dir_path)
+            written += 1
+        manifest.forget(stale_file)
+    return written
+
+
+def page_template_hash(template_path, images=None):
+    """
+    Returns the template hash recorded in the manifest for pages rendered with
+    the template at template_path and the given img attributes: pages depend
+    on the image attributes and on the code of the renderer (RENDERER_MODULES)
+    just like on the template, so changing either re-renders every page.
+    """
+    digest = hashlib.sha256(parser_fingerprint(RENDERER_MODULES))
+    digest.update(hash_file(template_path).encode("utf-8"))
+    if images is not None:
+        digest.update(images_fingerprint(images).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def find_pages(dir_path_content, dest_dir_path, base_path, manifest=None, template_hash=None, drafts=False,
+               shard=None):
+    """
+    Walks the content directory, creating the matching destination directories.
+    Draft pages are skipped unless drafts is True; telling them apart only
+    reads each page's front matter.
+    With shard, an (index, count) pair, only the pages of that shard (see
+    shard_pages) are kept.
+    Returns (pending, outputs, skipped): the (from_path, dest_path, source_hash)
+    triples that need rendering, a {dest_path: from_path} dict of every kept page,
+    and the number of pages the manifest says are already up to date.
+    """
+    # Ensure the destination directory exists
+    os.makedirs(dest_dir_path, exist_ok=True)
+    log.debug("dir_created", f"Created destination directory '{dest_dir_path}'.", path=dest_dir_path)
+
+    pages = []
+    outputs = {}
+    pending = []
+    skipped = 0
+
+    # Walk through the source directory in a stable order
+    for root, dirs, files in os.walk(dir_path_content):
+        dirs.sort()
+        # Compute the relative path from the source directory
+        relative_path = os.path.relpath(root, dir_path_content)
+        # Compute the corresponding destination path
+        dest_path = os.path.join(dest_dir_path, relative_path)
+
+        # Create directories in the destination
+        for dir_name in dirs:
+            dir_path = os.path.join(dest_path, dir_name)
+            os.makedirs(dir_path, exist_ok=True)
+            log.debug("dir_created", f"Created directory: {dir_path}", path=dir_path)
+
+        # Collect markdown files
+        for file_name in sorted(files):
+            if file_name.endswith(".md"):
+                src_file = os.path.join(root, file_name)
+                dest_file = os.path.join(dest_path, file_name.replace(".md", ".html"))
+                if not drafts and is_draft(read_fields(src_file)):
+                    log.debug("draft_skipped", f"Skipped draft: {src_file}", path=src_file)
+                    continue
+                pages.append((src_file, dest_file))
+
+    if shard is not None:
+        pages = shard_pages(pages, *shard)
+        log.info("shard", f"Shard {shard[0]} of {shard[1]}: {len(pages)} page(s).", pages=len(pages))
+
+    # Keep the pages that need rendering
+    for src_file, dest_file in pages:
+        outputs[dest_file] = src_file
+        source_hash = None
+        if manifest is not None:
+            source_hash = hash_file(src_file)
+            if manifest.is_current(dest_file, source_hash, template_hash, base_path):
+                skipped += 1
+                continue
+        pending.append((src_file, dest_file, source_hash))
+
+    return pending, outputs, skipped
+
+
+def generate_pages(pages, template_path, base_path, workers=1, profiler=NULL_PROFILER, block_cache=None, io_depth=0,
+                   images=None):
+    """
+    Generates every (from_path, dest_path) pair in pages.
+    With workers > 1 the pages are spread over a process pool; each page's log
+    records are captured in its worker and emitted in page order, and the first failing
+    page (in page order) raises, so output and errors match a serial build.
+    Falls back to a serial build when a process pool is not available.
+    Workers profile their own pages and the reports are merged into profiler.
+    Each worker keeps its own block_cache (see PagePool); only its on-disk
+    tier is shared between processes.
+    A serial build with io_depth > 0 reads up to io_depth markdown files ahead
+    on a thread pool and hands rendered pages to a PageWriter, so parsing does
+    not wait on disk; a process pool already overlaps its workers' I/O.
+    Returns the number of pages written; pages identical to their existing
+    output are left untouched.
+    """
+    if not pages:
+        return 0
+    # Compile the template once for the whole build
+    with profiler.stage("template_load"):
+        template = load_template(template_path, base_path)
+    log.debug("template_read", f"Read content from {template_path}", path=template_path)
+
+    if workers > 1 and len(pages) > 1:
+        # Forked workers must not inherit lines still waiting in the buffer
+        log.flush()
+        try:
+            pool = PagePool(
+                template, template_path, base_path, min(workers, len(pages)), block_cache, profiler.enabled, images
+            )
+        except (ImportError, NotImplementedError, OSError) as e:
+            log.warning("pool_unavailable", f"Process pool unavailable ({e}), building serially.")
+        else:
+            written = 0
+            with pool:
+                for records, report, changed in pool.render(pages):
+                    log.replay(records)
+                    written += changed
+                    if report is not None:
+                        profiler.merge(report)
+            return _count_written(written, len(pages), profiler)
+
+    if io_depth > 0:
+        sources = prefetch([from_path for from_path, _ in pages], io_depth)
+        with contextlib.closing(sources), profiler.instrument(), PageWriter(max_pending=io_depth) as writer:
+            for (from_path, dest_path), (_, source) in zip(pages, sources):
+                generate_page(
+                    from_path, template_path, dest_path, base_path, template, profiler, block_cache, source, writer,
+                    images,
+                )
+        profiler.count("write_batches", writer.batches)
+        return _count_written(writer.written, len(pages), profiler)
+
+    written = 0
+    with profiler.instrument():
+        for from_path, dest_path in pages:
+            written += generate_page(
+                from_path, template_path, dest_path, base_path, template, profiler, block_cache, images=images
+            )
+    return _count_written(written, len(pages), profiler)
+
+
+def _count_written(written, total, profiler):
+    profiler.count("pages_written", written)
+    profiler.count("pages_unchanged", total - written)
+    log.info(
+        "pages_generated",
+        f"Wrote {written} changed page(s), {total - written} unchanged.",
+        written=written,
+        unchanged=total - written,
+    )
+    return written
+
+
+class PagePool:
+    """
+    A long-lived process pool around generate_page.
+    Each worker process is initialized once with the compiled template, the
+    base path and its own copy of the block cache, which then stay warm for
+    every page the worker renders. Pages are sent in chunks of similar total
+    source size, largest pages first, so one huge page does not become the
+    tail of the build.
+    """
+
+    def __init__(self, template, template_path, base_path, workers, block_cache=None, profile=False, images=None):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(template, template_path, base_path, block_cache, profile, images),
+        )
+
+    def render(self, pages):
+        """
+        Renders every (from_path, dest_path) pair in pages and yields a
+        (records, report, changed) triple per page, in page order, where
+        records are the page's log records (see BuildLog.capture). A failed page
+        raises its error in its turn, after the pages before it were yielded.
+        """
+        chunks = balance_chunks(pages, self.workers * 4)
+        futures = [self.executor.submit(_render_chunk, chunk) for chunk in chunks]
+        results = {}
+        next_index = 0
+        for future in as_completed(futures):
+            for index, *result in future.result():
+                results[index] = result
+            while next_index in results:
+                records, report, changed, error = results.pop(next_index)
+                if error is not None:
+                    log.replay(records)
+                    raise error
+                yield records, report, changed
+                next_index += 1
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+def balance_chunks(pages, count):
+    """
+    Splits (from_path, dest_path) pages into about count chunks of similar
+    total source size. Pages are taken largest first, so the biggest pages
+    get chunks of their own and go out before the many small ones.
+    Returns a list of lists of (index, from_path, dest_path) triples, where
+    index is the page's position in pages.
+    """
+    sized = sorted(
+        ((_source_size(from_path), index, from_path, dest_path) for index, (from_path, dest_path) in enumerate(pages)),
+        key=lambda page: (-page[0], page[1]),
+    )
+    target = sum(size for size, *_ in sized) / count
+    chunks = []
+    chunk = []
+    chunk_size = 0
+    for size, index, from_path, dest_path in sized:
+        chunk.append((index, from_path, dest_path))
+        chunk_size += size
+        if chunk_size >= target:
+            chunks.append(chunk)
+            chunk = []
+            chunk_size = 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def shard_pages(pages, index, count):
+    """
+    Returns the (from_path, dest_path) pages that belong to shard index of
+    count, in their original order.
+    Pages are dealt largest first to the shard with the least source so far,
+    so every shard gets a similar amount of markdown. The split only depends
+    on the pages' paths and sizes, so separate shard processes over the same
+    content agree on it without talking to each other.
+    """
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"invalid shard: {index} of {count}")
+    sized = sorted(
+        ((_source_size(from_path), from_path, position) for position, (from_path, _) in enumerate(pages)),
+        key=lambda page: (-page[0], page[1]),
+    )
+    # (source size, page count, shard) of every shard, least loaded first
+    loads = [(0, 0, shard) for shard in range(count)]
+    assigned = []
+    for size, _, position in sized:
+        load, page_count, shard = heapq.heappop(loads)
+        heapq.heappush(loads, (load + size, page_count + 1, shard))
+        if shard == index:
+            assigned.append(position)
+    return [pages[position] for position in sorted(assigned)]
+
+
+def _source_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        # generate_page reports the error in the page's turn
+        return 0
+
+
+# Per-process state of a PagePool worker, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(template, template_path, base_path, block_cache, profile, images):
+    _worker.update(
+        template=template,
+        template_path=template_path,
+        base_path=base_path,
+        block_cache=block_cache,
+        profile=profile,
+        images=images,
+    )
+
+
+def _render_chunk(chunk):
+    # Runs in a worker process; returns each page's log records instead of
+    # emitting them, the page's profile when profiling, and its error instead
+    # of raising it
+    block_cache = _worker["block_cache"]
+    results = []
+    for index, from_path, dest_path in chunk:
+        profiler = BuildProfiler() if _worker["profile"] else NULL_PROFILER
+        if block_cache is not None:
+            hits = block_cache.hits + block_cache.disk_hits
+            misses = block_cache.misses
+        try:
+            with log.capture() as records, profiler.instrument():
+                changed = generate_page(
+                    from_path,
+                    _worker["template_path"],
+                    dest_path,
+                    _worker["base_path"],
+                    _worker["template"],
+                    profiler,
+                    block_cache,
+                    images=_worker["images"],
+                )
+        except Exception as e:
+            results.append((index, records, None, None, e))
+            continue
+        if profiler.enabled and block_cache is not None:
+            profiler.count("block_cache_hits", block_cache.hits + block_cache.disk_hits - hits)
+            profiler.count("block_cache_misses", block_cache.misses - misses)
+        results.append((index, records, profiler.report() if profiler.enabled else None, changed, None))
+    return results
+
+
+def resolve_workers(workers):
+    """
+    Returns the worker count to use; 0 means one worker per CPU core.
+    """
+    if workers < 0:
+        raise ValueError(f"invalid worker count: {workers}")
+    if workers == 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def remove_empty_dirs(path, stop_dir):
+    """
+    Removes path and its parents while they are empty, without going above stop_dir.
+    """
+    stop_dir = os.path.abspath(stop_dir)
+    path = os.path.abspath(path)
+    while path != stop_dir and path.startswith(stop_dir + os.sep):
+        if os.listdir(path):
+            break
+        os.rmdir(path)
+        path = os.path.dirname(path)
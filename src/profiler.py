@@ -0,0 +1,189 @@
+import contextlib
+import json
+import time
+
+import markdown_blocks
+
+
+# Functions wrapped by BuildProfiler.instrument(), as (module, attribute, stage name)
+INSTRUMENTED_FUNCTIONS = [
+    (markdown_blocks, "lex_blocks", "lex_blocks"),
+    (markdown_blocks, "block_to_html_node", "block_to_html_node"),
+    (markdown_blocks, "text_to_textnodes", "inline"),
+]
+
+
+class BuildProfiler:
+    """
+    Records per-stage and per-page timings and counters for a build.
+    Stages nest: a stage's self time excludes the time spent in stages
+    started inside it, so self times add up to the profiled total.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.pages = {}
+        self.counters = {}
+        self._stack = []
+        self._page = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        frame = [name, 0.0]
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            self_time = elapsed - frame[1]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+            stats = self.stages.setdefault(name, {"calls": 0, "total_seconds": 0.0, "self_seconds": 0.0})
+            stats["calls"] += 1
+            stats["total_seconds"] += elapsed
+            stats["self_seconds"] += self_time
+            if self._page is not None:
+                page_stages = self._page["stages"]
+                page_stages[name] = page_stages.get(name, 0.0) + self_time
+
+    @contextlib.contextmanager
+    def page(self, path):
+        """
+        Attributes the stages run inside the block to the page at path.
+        """
+        self._page = {"seconds": 0.0, "stages": {}}
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._page["seconds"] = time.perf_counter() - start
+            self.pages[path] = self._page
+            self._page = None
+            self.count("pages")
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def iterate(self, name, iterable):
+        """
+        Yields the items of iterable, timing the production of each one as a
+        stage, so a lazily evaluated pipeline stage is charged for the work it
+        does whenever its consumer pulls the next item.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    @contextlib.contextmanager
+    def instrument(self):
+        """
+        Times the parser's internal stages by temporarily wrapping the functions
+        in INSTRUMENTED_FUNCTIONS. Nothing is wrapped outside the block, so
+        unprofiled builds pay no overhead.
+        """
+        originals = []
+        for module, attribute, name in INSTRUMENTED_FUNCTIONS:
+            original = getattr(module, attribute)
+            originals.append((module, attribute, original))
+            setattr(module, attribute, self._timed(original, name))
+        try:
+            yield self
+        finally:
+            for module, attribute, original in originals:
+                setattr(module, attribute, original)
+
+    def _timed(self, func, name):
+        def timed(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return timed
+
+    def merge(self, report):
+        """
+        Adds the stages, pages and counters of another profiler's report,
+        e.g. one collected in a worker process.
+        """
+        for name, stats in report["stages"].items():
+            totals = self.stages.setdefault(name, {"calls": 0, "total_seconds": 0.0, "self_seconds": 0.0})
+            for key in totals:
+                totals[key] += stats[key]
+        for page in report["pages"]:
+            self.pages[page["path"]] = {"seconds": page["seconds"], "stages": page["stages"]}
+        for name, amount in report["counters"].items():
+            self.count(name, amount)
+
+    def report(self):
+        """
+        Returns the profile as a JSON-serializable dict.
+        """
+        return {
+            "total_seconds": time.perf_counter() - self.started,
+            "stages": {name: dict(stats) for name, stats in sorted(self.stages.items())},
+            "pages": [
+                {"path": path, "seconds": page["seconds"], "stages": page["stages"]}
+                for path, page in sorted(self.pages.items())
+            ],
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as report_file:
+            json.dump(self.report(), report_file, indent=2)
+
+    def format_summary(self, top=10):
+        """
+        Returns a plain-text summary of the slowest stages and pages.
+        """
+        report = self.report()
+        lines = [f"Build profile: {report['total_seconds'] * 1000:.1f} ms total"]
+        lines.append(f"  {'stage':<22} {'calls':>8} {'self ms':>10} {'total ms':>10}")
+        stages = sorted(report["stages"].items(), key=lambda item: item[1]["self_seconds"], reverse=True)
+        for name, stats in stages:
+            lines.append(
+                f"  {name:<22} {stats['calls']:>8} {stats['self_seconds'] * 1000:>10.2f}"
+                f" {stats['total_seconds'] * 1000:>10.2f}"
+            )
+        pages = sorted(report["pages"], key=lambda page: page["seconds"], reverse=True)[:top]
+        if pages:
+            lines.append(f"Slowest {len(pages)} page(s):")
+            for page in pages:
+                lines.append(f"  {page['seconds'] * 1000:>10.2f} ms  {page['path']}")
+        if report["counters"]:
+            lines.append("Counters: " + ", ".join(f"{name}={amount}" for name, amount in report["counters"].items()))
+        return "\n".join(lines)
+
+
+class NullProfiler:
+    """
+    Stand-in used when profiling is off; every hook is a no-op.
+    """
+
+    enabled = False
+
+    def stage(self, name):
+        return contextlib.nullcontext()
+
+    def page(self, path):
+        return contextlib.nullcontext()
+
+    def count(self, name, amount=1):
+        pass
+
+    def iterate(self, name, iterable):
+        return iterable
+
+    def instrument(self):
+        return contextlib.nullcontext(self)
+
+
+NULL_PROFILER = NullProfiler()
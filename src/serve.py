@@ -0,0 +1,186 @@
+import email.utils
+import hashlib
+import io
+import mimetypes
+import os
+import posixpath
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from build_log import log
+from front_matter import split_title
+from markdown_blocks import markdown_to_html_node
+from template import load_template
+
+
+class DevServer:
+    """
+    Serves the site straight from content/, static/ and the template, without
+    building docs/ first.
+    A page is rendered when it is requested and kept in memory until its
+    markdown file or the template changes, so an edit costs one page render on
+    the next request. Pages and static files carry an ETag and a Last-Modified
+    header and conditional requests are answered with 304 Not Modified.
+    """
+
+    def __init__(self, content_dir, static_dir, template_path, base_path="/", block_cache=None):
+        self.content_dir = os.path.abspath(content_dir)
+        self.static_dir = os.path.abspath(static_dir)
+        self.template_path = template_path
+        self.base_path = base_path
+        self.block_cache = block_cache
+        self.template = None
+        self.template_key = None
+        # {markdown path: (stat key, etag, mtime, body)}
+        self.pages = {}
+        self.renders = 0
+        self.lock = threading.Lock()
+
+    def resolve(self, url_path):
+        """
+        Maps a URL path to ("page", markdown path) or ("static", file path),
+        or returns None when nothing is served there.
+        """
+        path = urllib.parse.unquote(urllib.parse.urlsplit(url_path).path)
+        if self.base_path != "/" and path.startswith(self.base_path):
+            path = "/" + path[len(self.base_path):]
+        directory = path.endswith("/")
+        path = posixpath.normpath(path).lstrip("/")
+        if path.startswith(".."):
+            return None
+        if path in ("", "."):
+            path = "index.html"
+        elif directory or not posixpath.splitext(path)[1]:
+            path = posixpath.join(path, "index.html")
+        if path.endswith(".html"):
+            source = os.path.join(self.content_dir, *(path[: -len(".html")] + ".md").split("/"))
+            if os.path.isfile(source):
+                return "page", source
+        static_file = os.path.join(self.static_dir, *path.split("/"))
+        if os.path.isfile(static_file):
+            return "static", static_file
+        return None
+
+    def page(self, source):
+        """
+        Returns the (etag, mtime, body) of the page rendered from source,
+        rendering it only if it or the template changed since the last request.
+        """
+        with self.lock:
+            template_key = _stat_key(self.template_path)
+            if template_key != self.template_key:
+                # Every page depends on the template
+                self.template = load_template(self.template_path, self.base_path)
+                self.template_key = template_key
+                self.pages.clear()
+            key = _stat_key(source)
+            entry = self.pages.get(source)
+            if entry is None or entry[0] != key:
+                with open(source, "r", encoding="utf-8") as source_file:
+                    markdown = source_file.read()
+                _, title, lines = split_title(io.StringIO(markdown, newline="\n"))
+                markdown = "".join(lines)
+                if not markdown.strip():
+                    raise Exception("Markdown content is empty")
+                html = markdown_to_html_node(markdown, self.block_cache).to_html()
+                body = self.template.render(Content=html, Title=title).encode("utf-8")
+                etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+                mtime = max(key[1], template_key[1]) // 1_000_000_000
+                entry = self.pages[source] = (key, etag, mtime, body)
+                self.renders += 1
+            return entry[1:]
+
+    def respond(self, url_path, headers, head=False):
+        """
+        Returns the (status, headers, body) response to a GET (or HEAD) request.
+        """
+        resolved = self.resolve(url_path)
+        if resolved is None:
+            return 404, {"Content-Type": "text/plain; charset=utf-8"}, b"Not found\n"
+        kind, path = resolved
+        if kind == "page":
+            try:
+                etag, mtime, body = self.page(path)
+            except Exception as e:
+                log.error("render_failed", f"Failed to render {path}: {e}", path=path)
+                return 500, {"Content-Type": "text/plain; charset=utf-8"}, f"{e}\n".encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+            size = len(body)
+        else:
+            stat = os.stat(path)
+            etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+            mtime = stat.st_mtime_ns // 1_000_000_000
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            size = stat.st_size
+            body = None
+        response_headers = {
+            "ETag": etag,
+            "Last-Modified": email.utils.formatdate(mtime, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+        if _not_modified(headers, etag, mtime):
+            return 304, response_headers, b""
+        response_headers["Content-Type"] = content_type
+        response_headers["Content-Length"] = str(size)
+        if head:
+            return 200, response_headers, b""
+        if body is None:
+            with open(path, "rb") as static_file:
+                body = static_file.read()
+        return 200, response_headers, body
+
+    def serve(self, host="localhost", port=8888):
+        """
+        Serves requests until interrupted.
+        """
+        server = ThreadingHTTPServer((host, port), _handler_for(self))
+        log.info("serving", f"Serving '{self.content_dir}' and '{self.static_dir}' at http://{host}:{port}{self.base_path}")
+        log.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            log.info("stopped", "Stopped serving.")
+        finally:
+            server.server_close()
+
+
+def _not_modified(headers, etag, mtime):
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = email.utils.parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return mtime <= since.timestamp()
+
+
+def _handler_for(dev_server):
+    class DevRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._send(dev_server.respond(self.path, self.headers))
+
+        def do_HEAD(self):
+            self._send(dev_server.respond(self.path, self.headers, head=True))
+
+        def _send(self, response):
+            status, headers, body = response
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            if "Content-Length" not in headers and status != 304:
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return DevRequestHandler
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
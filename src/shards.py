@@ -0,0 +1,73 @@
+import os
+
+from assets import is_unchanged, sync_file
+from build_log import DEBUG, log
+from manifest import BuildManifest
+from pages import remove_empty_dirs
+
+
+SHARD_MANIFEST = ".build-manifest.json"
+
+
+def shard_dir(shards_dir, index):
+    """
+    Returns the directory shard index builds its pages and manifest into.
+    """
+    return os.path.join(shards_dir, str(index))
+
+
+def merge_shards(shard_dirs, dest_dir, manifest, link_mode="copy"):
+    """
+    Combines the pages built by separate shard builds into dest_dir.
+    Each shard directory holds the pages of one shard and the manifest that
+    build saved as SHARD_MANIFEST; the pages it records are copied (or linked,
+    see sync_file) into dest_dir and recorded in manifest with their sources,
+    so a later incremental build of dest_dir knows them. Pages identical to
+    those already in dest_dir are not copied, and recorded pages no shard
+    built any more are removed.
+    Returns (outputs, merged, removed): a {dest_path: from_path} dict of every
+    page, the (from_path, dest_path) pairs of the pages that were copied and
+    the number of stale pages removed.
+    """
+    outputs = {}
+    merged = []
+    for directory in shard_dirs:
+        manifest_path = os.path.join(directory, SHARD_MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"Shard '{directory}' has no manifest; was it built?")
+        shard_manifest = BuildManifest.load(manifest_path)
+        prefix = os.path.normpath(directory).replace(os.sep, "/") + "/"
+        for key, entry in sorted(shard_manifest.pages.items()):
+            if not key.startswith(prefix):
+                raise ValueError(f"Shard '{directory}' records a page outside of it: {key}")
+            relative_path = key[len(prefix):]
+            dest_file = os.path.join(dest_dir, *relative_path.split("/"))
+            if dest_file in outputs:
+                raise ValueError(f"Page '{relative_path}' was built by more than one shard")
+            outputs[dest_file] = entry["source"]
+            src_file = os.path.join(directory, *relative_path.split("/"))
+            if not is_unchanged(src_file, dest_file):
+                os.makedirs(os.path.dirname(dest_file), exist_ok=True)
+                with log.timed(DEBUG, "page_merged", f"Merged page: {src_file} -> {dest_file}", path=dest_file):
+                    sync_file(src_file, dest_file, link_mode)
+                merged.append((entry["source"], dest_file))
+            manifest.record(
+                dest_file, entry["source"], entry["source_hash"], entry["template_hash"], entry["base_path"]
+            )
+    log.info(
+        "shards_merged",
+        f"Merged {len(shard_dirs)} shard(s): {len(merged)} page(s) copied, {len(outputs) - len(merged)} unchanged.",
+        copied=len(merged),
+        unchanged=len(outputs) - len(merged),
+    )
+
+    # Remove pages that no shard built this time
+    removed = 0
+    for stale_file in manifest.stale_outputs(outputs):
+        if os.path.exists(stale_file):
+            os.remove(stale_file)
+            log.debug("page_removed", f"Removed stale page: {stale_file}", path=stale_file)
+            remove_empty_dirs(os.path.dirname(stale_file), dest_dir)
+            removed += 1
+        manifest.forget(stale_file)
+    return outputs, merged, removed
@@ -0,0 +1,280 @@
+import hashlib
+import html
+import json
+import os
+import re
+from xml.sax.saxutils import escape, quoteattr
+
+from build_log import log
+from front_matter import read_metadata
+from htmlnode import LeafNode, ParentNode
+from page_io import write_page
+from pages import remove_empty_dirs
+from template import load_template
+
+
+FEED_FILE = "feed.xml"
+TAGS_DIR = "tags"
+
+
+class SiteIndex:
+    """
+    Metadata of every page in the site: its URL, title and front-matter fields,
+    keyed by output path relative to the destination directory.
+    The index is collected while pages are generated and saved between builds,
+    so an incremental build only updates the entries of the pages it renders.
+    Section listings, tag pages and an Atom feed are generated from the index
+    alone, without parsing any markdown.
+    """
+
+    VERSION = 2
+
+    def __init__(self, dest_dir, entries=None, generated=None):
+        self.dest_dir = dest_dir
+        self.entries = entries if entries is not None else {}
+        # Outputs written by write_pages, so stale ones can be removed later
+        self.generated = generated if generated is not None else []
+
+    @classmethod
+    def load(cls, path, dest_dir):
+        """
+        Loads an index saved by save(). A missing, unreadable or outdated
+        index yields an empty one, which is filled in from the pages' sources.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as index_file:
+                data = json.load(index_file)
+        except (OSError, ValueError):
+            return cls(dest_dir)
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            return cls(dest_dir)
+        return cls(dest_dir, data.get("entries", {}), data.get("generated", []))
+
+    def save(self, path):
+        data = {"version": self.VERSION, "entries": self.entries, "generated": self.generated}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as index_file:
+            json.dump(data, index_file, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def key(self, output):
+        return os.path.relpath(output, self.dest_dir).replace(os.sep, "/")
+
+    def has(self, output):
+        return self.key(output) in self.entries
+
+    def update(self, pages):
+        """
+        Records the metadata of each (from_path, dest_path) pair in pages,
+        reading only the front matter of each source (see read_metadata).
+        """
+        for from_path, dest_path in pages:
+            title, fields = read_metadata(from_path)
+            key = self.key(dest_path)
+            self.entries[key] = {
+                "source": from_path.replace(os.sep, "/"),
+                "url": url_for(key),
+                "title": title,
+                "fields": fields,
+                "updated": _updated(fields),
+            }
+
+    def refresh(self, outputs, rendered):
+        """
+        Brings the index up to date with a build: outputs is a
+        {dest_path: from_path} dict of every page and rendered the
+        (from_path, dest_path) pairs that were just rendered.
+        """
+        self.retain(outputs)
+        self.update(
+            [(from_path, dest_path) for dest_path, from_path in outputs.items() if not self.has(dest_path)]
+            + [(from_path, dest_path) for from_path, dest_path in rendered if self.has(dest_path)]
+        )
+
+    def forget(self, output):
+        self.entries.pop(self.key(output), None)
+
+    def retain(self, outputs):
+        """
+        Drops the entries of pages that are not among outputs any more.
+        """
+        current = {self.key(output) for output in outputs}
+        for key in [key for key in self.entries if key not in current]:
+            del self.entries[key]
+
+    def sections(self):
+        """
+        Returns {section: entries} for the pages below each top-level content
+        directory, newest first; a directory's own index page is not a member.
+        """
+        sections = {}
+        for key, entry in self.entries.items():
+            parts = key.split("/")
+            if len(parts) >= 3 or (len(parts) == 2 and parts[1] != "index.html"):
+                sections.setdefault(parts[0], []).append(entry)
+        return {section: _newest_first(entries) for section, entries in sorted(sections.items())}
+
+    def tags(self):
+        """
+        Returns {tag: entries} from the pages' "tags" fields, newest first.
+        """
+        tags = {}
+        for entry in self.entries.values():
+            for tag in _tags(entry["fields"]):
+                tags.setdefault(tag, []).append(entry)
+        return {tag: _newest_first(entries) for tag, entries in sorted(tags.items())}
+
+    def write_pages(self, template_path, base_path, site_url=""):
+        """
+        Writes a listing page for every section without an index page of its
+        own, a page per tag plus a tag list, and, given the site_url its links
+        and ids are made absolute with, an Atom feed of the sections' pages.
+        Generated outputs that are no longer produced are removed.
+        Returns the number of files written or removed.
+        """
+        template = load_template(template_path, base_path)
+        outputs = {}
+        for section, entries in self.sections().items():
+            key = f"{section}/index.html"
+            if key not in self.entries:
+                outputs[key] = _render(template, section.replace("-", " ").title(), _listing(entries))
+        tags = self.tags()
+        slugs = tag_slugs(tags)
+        for tag, entries in tags.items():
+            outputs[f"{TAGS_DIR}/{slugs[tag]}/index.html"] = _render(template, f"Tagged: {tag}", _listing(entries))
+        if tags:
+            links = [(tag, f"/{TAGS_DIR}/{slugs[tag]}/") for tag in tags]
+            outputs[f"{TAGS_DIR}/index.html"] = _render(template, "Tags", _link_list(links))
+        if site_url:
+            feed_entries = _newest_first([entry for entries in self.sections().values() for entry in entries])
+            outputs[FEED_FILE] = self.feed(feed_entries, base_path, site_url)
+        else:
+            # Atom ids must be absolute URIs, so there is no valid feed without one
+            log.info("feed_skipped", f"No site URL given; {FEED_FILE} is not written.")
+
+        changed = 0
+        for key, text in outputs.items():
+            path = os.path.join(self.dest_dir, *key.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if write_page(path, [text]):
+                changed += 1
+                log.debug("index_page_written", f"Wrote index page {path}", path=path)
+        for key in self.generated:
+            path = os.path.join(self.dest_dir, *key.split("/"))
+            if key not in outputs and key not in self.entries and os.path.exists(path):
+                os.remove(path)
+                changed += 1
+                log.debug("index_page_removed", f"Removed stale index page: {path}", path=path)
+                remove_empty_dirs(os.path.dirname(path), self.dest_dir)
+        self.generated = sorted(outputs)
+        return changed
+
+    def feed(self, entries, base_path, site_url):
+        """
+        Returns an Atom feed of entries, linked below site_url and base_path.
+        """
+        root = site_url.rstrip("/") + base_path
+        site_title = self.entries.get("index.html", {}).get("title", "Feed")
+        updated = max((entry["updated"] for entry in entries), default=_EPOCH)
+        lines = [
+            '<?xml version="1.0" encoding="utf-8"?>',
+            '<feed xmlns="http://www.w3.org/2005/Atom">',
+            f"  <title>{escape(site_title)}</title>",
+            f"  <link href={quoteattr(root)} />",
+            f'  <link rel="self" href={quoteattr(root + FEED_FILE)} />',
+            f"  <id>{escape(root)}</id>",
+            f"  <updated>{updated}</updated>",
+        ]
+        for entry in entries:
+            link = root + entry["url"].lstrip("/")
+            lines.append("  <entry>")
+            lines.append(f"    <title>{escape(entry['title'])}</title>")
+            lines.append(f"    <link href={quoteattr(link)} />")
+            lines.append(f"    <id>{escape(link)}</id>")
+            lines.append(f"    <updated>{entry['updated']}</updated>")
+            for tag in _tags(entry["fields"]):
+                lines.append(f"    <category term={quoteattr(tag)} />")
+            if entry["fields"].get("summary"):
+                lines.append(f"    <summary>{escape(str(entry['fields']['summary']))}</summary>")
+            lines.append("  </entry>")
+        lines.append("</feed>")
+        return "\n".join(lines) + "\n"
+
+    def __repr__(self):
+        return f"SiteIndex({self.dest_dir}, {len(self.entries)} page(s))"
+
+
+def url_for(key):
+    """
+    Returns the root-relative URL of an output path relative to the site root.
+    """
+    if key == "index.html":
+        return "/"
+    if key.endswith("/index.html"):
+        return "/" + key[: -len("index.html")]
+    return "/" + key
+
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "tag"
+
+
+def tag_slugs(tags):
+    """
+    Returns {tag: slug} with a distinct slug for every tag. Tags whose slugs
+    collide ("C", "C++" and "C#" are all "c") get a short hash of the tag
+    appended, except for a tag that is its own slug ("c"), which keeps it.
+    """
+    groups = {}
+    for tag in tags:
+        groups.setdefault(slugify(tag), []).append(tag)
+    slugs = {}
+    for slug, group in groups.items():
+        for tag in group:
+            if len(group) == 1 or tag == slug:
+                slugs[tag] = slug
+            else:
+                slugs[tag] = f"{slug}-{hashlib.sha256(tag.encode('utf-8')).hexdigest()[:8]}"
+    return slugs
+
+
+_EPOCH = "1970-01-01T00:00:00Z"
+
+
+def _updated(fields):
+    # An Atom timestamp from the page's date field. Pages without one get the
+    # epoch rather than their modification time, which would differ between
+    # checkouts and make the feed change without any edit.
+    date = fields.get("date")
+    if date is None:
+        return _EPOCH
+    date = str(date)
+    return date if "T" in date else f"{date}T00:00:00Z"
+
+
+def _tags(fields):
+    tags = fields.get("tags", [])
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",")]
+    return [str(tag) for tag in tags if str(tag)]
+
+
+def _newest_first(entries):
+    entries = sorted(entries, key=lambda entry: entry["url"])
+    return sorted(entries, key=lambda entry: entry["updated"], reverse=True)
+
+
+def _listing(entries):
+    return _link_list([(entry["title"], entry["url"]) for entry in entries])
+
+
+def _link_list(links):
+    items = [
+        ParentNode("li", [LeafNode("a", html.escape(text, quote=False), {"href": url})]) for text, url in links
+    ]
+    return ParentNode("ul", items)
+
+
+def _render(template, title, body):
+    content = ParentNode("div", [LeafNode("h1", html.escape(title, quote=False)), body])
+    return template.render(Content=content.to_html(), Title=html.escape(title, quote=False))
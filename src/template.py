@@ -0,0 +1,86 @@
+import re
+
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+SRCSET_PATTERN = re.compile(r'srcset="([^"]*)"')
+
+
+class Template:
+    """
+    A page template compiled once per build.
+    The source is pre-split into static segments and placeholder slots, so
+    rendering a page is a single join instead of a full-page str.replace per
+    placeholder. Root-relative links in the static segments are rewritten for
+    the base path at compile time; slot values are rewritten as they are filled.
+    """
+
+    def __init__(self, source, base_path="/"):
+        self.base_path = base_path
+        # segments[i] is followed by slots[i]; there is always one more segment than slots
+        self.segments = []
+        self.slots = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.segments.append(rewrite_links(source[position:match.start()], base_path))
+            self.slots.append(match.group(1))
+            position = match.end()
+        self.segments.append(rewrite_links(source[position:], base_path))
+
+    def render(self, **values):
+        """
+        Returns the page with each placeholder replaced by the matching keyword value.
+        Placeholders without a value are left as they are.
+        """
+        return "".join(self.iter_render(**values))
+
+    def iter_render(self, **values):
+        """
+        Yields the rendered page as string fragments.
+        A value may be a string or an iterable of string fragments (such as
+        HTMLNode.iter_html()), which is streamed through without being joined.
+        """
+        for slot in set(self.slots):
+            # A streamed value can only be consumed once
+            if self.slots.count(slot) > 1 and not isinstance(values.get(slot, ""), str):
+                values[slot] = "".join(values[slot])
+        yield self.segments[0]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            value = values.get(slot)
+            if value is None:
+                yield f"{{{{ {slot} }}}}"
+            elif isinstance(value, str):
+                yield rewrite_links(value, self.base_path)
+            else:
+                for fragment in value:
+                    yield rewrite_links(fragment, self.base_path)
+            yield segment
+
+    def __repr__(self):
+        return f"Template({self.slots}, {self.base_path})"
+
+
+def load_template(template_path, base_path="/"):
+    """
+    Reads and compiles the template file at template_path.
+    """
+    with open(template_path, "r", encoding="utf-8") as template_file:
+        return Template(template_file.read(), base_path)
+
+
+def rewrite_links(html, base_path):
+    """
+    Points root-relative href, src and srcset attributes at base_path.
+    """
+    if base_path == "/":
+        return html
+    html = html.replace("href=\"/", f"href=\"{base_path}")
+    html = html.replace("src=\"/", f"src=\"{base_path}")
+    if "srcset=\"" in html:
+        html = SRCSET_PATTERN.sub(lambda match: _rewrite_srcset(match.group(1), base_path), html)
+    return html
+
+
+def _rewrite_srcset(srcset, base_path):
+    candidates = [candidate.strip() for candidate in srcset.split(",")]
+    rewritten = [base_path + candidate[1:] if candidate.startswith("/") else candidate for candidate in candidates]
+    return f'srcset="{", ".join(rewritten)}"'
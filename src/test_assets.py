@@ -0,0 +1,80 @@
+import os
+import unittest
+
+from assets import is_unchanged, prune_directory, sync_directory
+from manifest import BuildManifest
+from test_support import TempDirTestCase
+
+
+class TestSyncDirectory(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = self.path("static")
+        self.dest = self.path("docs")
+        os.makedirs(os.path.join(self.source, "images"))
+        self.write(os.path.join(self.source, "index.css"), "body {}")
+        self.write(os.path.join(self.source, "images", "a.png"), "png-a")
+
+    def test_copies_only_changed_files(self):
+        manifest = BuildManifest()
+        self.assertEqual(sync_directory(self.source, self.dest, manifest), (2, 0, 0))
+        self.assertEqual(sync_directory(self.source, self.dest, manifest), (0, 2, 0))
+        css = os.path.join(self.source, "index.css")
+        self.write(css, "body { color: red; }")
+        self.assertEqual(sync_directory(self.source, self.dest, manifest), (1, 1, 0))
+        self.assertEqual(self.read(os.path.join(self.dest, "index.css")), "body { color: red; }")
+
+    def test_removes_stale_files_only(self):
+        manifest = BuildManifest()
+        sync_directory(self.source, self.dest, manifest)
+        page = os.path.join(self.dest, "index.html")
+        self.write(page, "<p>generated page</p>")
+        os.remove(os.path.join(self.source, "images", "a.png"))
+        self.assertEqual(sync_directory(self.source, self.dest, manifest), (0, 1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "a.png")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_hash_detects_same_size_and_mtime_edit(self):
+        sync_directory(self.source, self.dest)
+        css = os.path.join(self.source, "index.css")
+        dest_css = os.path.join(self.dest, "index.css")
+        stat = os.stat(css)
+        self.write(css, "body []")
+        os.utime(css, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertTrue(is_unchanged(css, dest_css))
+        self.assertFalse(is_unchanged(css, dest_css, use_hash=True))
+        sync_directory(self.source, self.dest, use_hash=True)
+        self.assertEqual(self.read(dest_css), "body []")
+
+    def test_hardlink_mode(self):
+        sync_directory(self.source, self.dest, link_mode="hardlink")
+        src_css = os.path.join(self.source, "index.css")
+        dest_css = os.path.join(self.dest, "index.css")
+        self.assertEqual(self.read(dest_css), "body {}")
+        self.assertTrue(os.path.samefile(src_css, dest_css))
+        self.assertEqual(sync_directory(self.source, self.dest, link_mode="hardlink"), (0, 2, 0))
+
+    def test_reflink_mode_falls_back_to_copy(self):
+        sync_directory(self.source, self.dest, link_mode="reflink")
+        self.assertEqual(self.read(os.path.join(self.dest, "images", "a.png")), "png-a")
+
+    def test_prune_keeps_recorded_files_and_siblings(self):
+        manifest = BuildManifest()
+        sync_directory(self.source, self.dest, manifest)
+        os.makedirs(os.path.join(self.dest, "old"))
+        self.write(os.path.join(self.dest, "old", "page.html"), "<p>old</p>")
+        self.write(os.path.join(self.dest, "index.css.gz"), "gz")
+        self.write(os.path.join(self.dest, "old.css.gz"), "gz")
+        self.assertEqual(prune_directory(self.dest, manifest, (".gz",)), 2)
+        self.assertEqual(
+            sorted(os.listdir(self.dest)), ["images", "index.css", "index.css.gz"]
+        )
+        self.assertEqual(prune_directory(self.dest, manifest), 1)
+
+    def test_invalid_link_mode(self):
+        with self.assertRaises(ValueError):
+            sync_directory(self.source, self.dest, link_mode="symlink")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from markdown_blocks import markdown_to_html_node
+
+
+MARKDOWN = """# Title
+
+> A shared **disclaimer**
+
+Some [link](/blog) text
+
+> A shared **disclaimer**
+"""
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = BlockCache()
+        self.assertIsNone(cache.get("block"))
+        cache.put("block", "<p>block</p>")
+        self.assertEqual(cache.get("block"), "<p>block</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = BlockCache(maxsize=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+        self.assertEqual(cache.get("a"), "A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            BlockCache(directory=tmp).put("block", "<p>block</p>")
+            cache = BlockCache(directory=tmp)
+            self.assertEqual(cache.get("block"), "<p>block</p>")
+            self.assertEqual(cache.disk_hits, 1)
+            self.assertTrue(os.listdir(tmp))
+
+    def test_pickle_keeps_settings_only(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = BlockCache(maxsize=10, directory=tmp)
+            cache.put("block", "<p>block</p>")
+            copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual((copy.maxsize, copy.directory), (10, tmp))
+        self.assertEqual(len(copy.entries), 0)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            BlockCache(maxsize=0)
+
+    def test_markdown_to_html_node_with_cache(self):
+        cache = BlockCache()
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (5, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import io
+import json
+import unittest
+
+from build_log import DEBUG, INFO, BuildLog
+
+
+class TestBuildLog(unittest.TestCase):
+    def test_summary_prints_totals_only(self):
+        stream = io.StringIO()
+        log = BuildLog(stream=stream)
+        log.debug("page_written", "Wrote a", duration_ms=2.0)
+        log.debug("page_written", "Wrote b", duration_ms=1.5)
+        log.info("pages_generated", "Wrote 2 changed page(s).")
+        self.assertEqual(stream.getvalue(), "")
+        log.close()
+        self.assertEqual(
+            stream.getvalue(),
+            "Wrote 2 changed page(s).\nBuild events: 2 page_written (3.5 ms), 1 pages_generated.\n",
+        )
+
+    def test_text_levels_and_buffering(self):
+        stream = io.StringIO()
+        log = BuildLog(DEBUG, "text", stream, buffer_lines=3)
+        log.debug("a", "one")
+        log.info("b", "two")
+        self.assertEqual(stream.getvalue(), "")
+        log.debug("c", "three")
+        self.assertEqual(stream.getvalue(), "one\ntwo\nthree\n")
+        log.warning("d", "four")
+        self.assertEqual(stream.getvalue(), "one\ntwo\nthree\nfour\n")
+        log.configure(INFO, "text", stream)
+        log.debug("e", "hidden")
+        log.close()
+        self.assertEqual(stream.getvalue(), "one\ntwo\nthree\nfour\n")
+
+    def test_json_lines_with_durations(self):
+        stream = io.StringIO()
+        log = BuildLog(DEBUG, "json", stream)
+        with log.timed(DEBUG, "file_copied", "Copied x", path="x"):
+            pass
+        log.close()
+        (line,) = stream.getvalue().splitlines()
+        record = json.loads(line)
+        self.assertEqual((record["level"], record["event"], record["path"]), ("debug", "file_copied", "x"))
+        self.assertGreaterEqual(record["duration_ms"], 0)
+
+    def test_capture_and_replay(self):
+        stream = io.StringIO()
+        log = BuildLog(DEBUG, "text", stream)
+        with log.capture() as records:
+            log.debug("page_read", "Read a")
+            log.error("render_failed", "Failed a")
+        self.assertEqual([record["event"] for record in records], ["page_read", "render_failed"])
+        self.assertEqual(stream.getvalue(), "")
+        log.replay(records)
+        self.assertEqual(stream.getvalue(), "Read a\nFailed a\n")
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            BuildLog(format="xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import gzip
+import os
+import unittest
+
+from compress import COMPRESSORS, precompress_file, precompress_tree
+from test_support import TempDirTestCase
+
+
+class TestPrecompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.path("index.html")
+        self.write(self.page, "<p>hello</p>" * 100)
+
+    def test_writes_gzip_sibling(self):
+        self.assertEqual(precompress_file(self.page), len(COMPRESSORS))
+        with gzip.open(self.page + ".gz", "rt", encoding="utf-8") as file:
+            self.assertEqual(file.read(), "<p>hello</p>" * 100)
+
+    def test_skips_unchanged_files(self):
+        precompress_file(self.page)
+        self.assertEqual(precompress_file(self.page), 0)
+        self.write(self.page, "<p>changed</p>")
+        stat = os.stat(self.page)
+        os.utime(self.page, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(precompress_file(self.page), len(COMPRESSORS))
+
+    def test_reproducible(self):
+        precompress_file(self.page)
+        with open(self.page + ".gz", "rb") as file:
+            first = file.read()
+        os.remove(self.page + ".gz")
+        precompress_file(self.page)
+        with open(self.page + ".gz", "rb") as file:
+            self.assertEqual(file.read(), first)
+
+    def test_tree(self):
+        os.makedirs(self.path("blog"))
+        self.write(self.path("blog", "index.html"), "<p>post</p>")
+        self.write(self.path("index.css"), "body {}")
+        self.write(self.path("image.png"), "png")
+        self.write(self.path("gone.html.gz"), "stale")
+        written, removed = precompress_tree(self.tmp.name, workers=2)
+        self.assertEqual(written, 3 * len(COMPRESSORS))
+        self.assertEqual(removed, 1)
+        self.assertTrue(os.path.exists(self.path("blog", "index.html.gz")))
+        self.assertFalse(os.path.exists(self.path("image.png.gz")))
+        self.assertFalse(os.path.exists(self.path("gone.html.gz")))
+        self.assertEqual(precompress_tree(self.tmp.name), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+
+from corpus import CorpusGenerator
+from markdown_blocks import markdown_to_blocks, markdown_to_html_node
+
+
+class TestCorpusGenerator(unittest.TestCase):
+    def test_deterministic(self):
+        self.assertEqual(CorpusGenerator(seed=3).page(30), CorpusGenerator(seed=3).page(30))
+        self.assertNotEqual(CorpusGenerator(seed=3).page(30), CorpusGenerator(seed=4).page(30))
+
+    def test_pages_parse(self):
+        generator = CorpusGenerator(seed=1, link_density=0.5)
+        for _ in range(20):
+            markdown = generator.page(20)
+            self.assertEqual(len(markdown_to_blocks(markdown)), 21)
+            html = markdown_to_html_node(markdown).to_html()
+            self.assertIn("<a href=", html)
+
+    def test_block_mix(self):
+        generator = CorpusGenerator(block_mix={"code": 1})
+        blocks = markdown_to_blocks(generator.page(5))
+        self.assertTrue(all(block.startswith("```") for block in blocks[1:]))
+
+    def test_write_nests_pages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = CorpusGenerator(depth=3).write(tmp, 12, 3)
+            self.assertEqual(len(paths), 12)
+            relative = os.path.relpath(paths[11], tmp).split(os.sep)
+            self.assertEqual(relative, ["section-0", "section-0", "section-1", "page-11", "index.md"])
+            self.assertTrue(all(os.path.exists(path) for path in paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from front_matter import (
+    is_draft,
+    parse_yaml,
+    read_fields,
+    read_metadata,
+    split_front_matter,
+    split_markdown,
+    split_title,
+)
+from test_support import TempDirTestCase
+
+
+class TestSplitFrontMatter(unittest.TestCase):
+    def test_yaml(self):
+        fields, body = split_markdown("---\ntitle: 'Hello: World'\ndraft: false\n---\n# Heading\n\nText")
+        self.assertEqual(fields, {"title": "Hello: World", "draft": False})
+        self.assertEqual(body, "# Heading\n\nText")
+
+    def test_toml(self):
+        fields, body = split_markdown('+++\ntitle = "T"\ndate = 2024-03-01\ntags = ["x"]\n+++\nBody')
+        self.assertEqual(fields, {"title": "T", "date": "2024-03-01", "tags": ["x"]})
+        self.assertEqual(body, "Body")
+
+    def test_without_front_matter(self):
+        self.assertEqual(split_markdown("# Title\n---\n"), ({}, "# Title\n---\n"))
+        self.assertEqual(split_markdown(""), ({}, ""))
+
+    def test_unterminated(self):
+        with self.assertRaises(ValueError):
+            split_markdown("---\ntitle: x\n# Title")
+
+    def test_body_is_not_read(self):
+        lines = iter(["---\n", "a: 1\n", "---\n", "# Title\n", "Body\n"])
+        fields, body = split_front_matter(lines)
+        self.assertEqual(fields, {"a": 1})
+        self.assertEqual(next(lines), "# Title\n")
+        self.assertEqual(list(body), ["Body\n"])
+
+    def test_title_skips_blank_lines_after_header(self):
+        fields, title, body = split_title(iter(["---\n", "a: 1\n", "---\n", "\n", "# Hello\n", "Text\n"]))
+        self.assertEqual((fields, title), ({"a": 1}, "Hello"))
+        self.assertEqual(list(body), ["\n", "# Hello\n", "Text\n"])
+        self.assertEqual(split_title(iter(["\n", "# Hello\n"]))[1], "")
+
+    def test_yaml_lists_and_scalars(self):
+        fields = parse_yaml("tags:\n  - one\n  - \"two\"\ncount: 3\nempty:\nnote: a # comment\n# skipped\n")
+        self.assertEqual(fields, {"tags": ["one", "two"], "count": 3, "empty": None, "note": "a"})
+        fields = parse_yaml("title: \"a\" # note\nsubtitle: 'b # c'  # note\nhash: \"x#y\"\n")
+        self.assertEqual(fields, {"title": "a", "subtitle": "b # c", "hash": "x#y"})
+        with self.assertRaises(ValueError):
+            parse_yaml("author:\n  name: x\n")
+
+
+class TestReadMetadata(TempDirTestCase):
+    def page(self, text):
+        return self.write("page.md", text)
+
+    def test_title_from_field_or_first_line(self):
+        self.assertEqual(read_metadata(self.page("---\ntitle: Field\n---\n# Heading")), ("Field", {"title": "Field"}))
+        self.assertEqual(read_metadata(self.page("---\ndraft: yes\n---\n# Heading\n")), ("Heading", {"draft": True}))
+        self.assertEqual(read_metadata(self.page("# Plain\r\n\r\nText")), ("Plain", {}))
+        self.assertEqual(
+            read_metadata(self.page("---\ndate: 2024-01-02\n---\n\n# Hello")), ("Hello", {"date": "2024-01-02"})
+        )
+
+    def test_drafts(self):
+        self.assertTrue(is_draft(read_fields(self.page("+++\ndraft = true\n+++\n# Draft"))))
+        self.assertFalse(is_draft(read_fields(self.page("# Published"))))
+        self.assertFalse(is_draft({"draft": "true"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
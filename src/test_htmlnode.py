@@ -1,5 +1,6 @@
+import io
 import unittest
-from htmlnode import LeafNode, ParentNode, HTMLNode
+from htmlnode import LeafNode, ParentNode, HTMLNode, render_html
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -108,6 +109,89 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+                LeafNode("a", "link", {"href": "/blog"}),
+            ],
+        )
+        fragments = list(node.iter_html())
+        self.assertGreater(len(fragments), 1)
+        self.assertEqual("".join(fragments), node.to_html())
+
+    def test_write_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, str(i))]) for i in range(3)])
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), "<ul><li>0</li><li>1</li><li>2</li></ul>")
+
+    def test_iter_html_errors(self):
+        with self.assertRaises(ValueError):
+            list(ParentNode("div", None).iter_html())
+        with self.assertRaises(ValueError):
+            list(ParentNode("div", [LeafNode("b", None)]).iter_html())
+
+    def test_render_deeply_nested(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("blockquote", [node])
+        html = render_html(node)
+        self.assertEqual(html, "<blockquote>" * 5000 + "<b>deep</b>" + "</blockquote>" * 5000)
+        self.assertEqual(node.to_html(), html)
+
+    def test_render_props_and_empty_parents(self):
+        props = {"href": "/", "class": "nav"}
+        node = ParentNode(
+            "div",
+            [ParentNode("ul", []), LeafNode("a", "one", props), ParentNode("p", [LeafNode("a", "two", props)])],
+            {"id": "main"},
+        )
+        self.assertEqual(
+            render_html(node),
+            '<div id="main"><ul></ul><a href="/" class="nav">one</a><p><a href="/" class="nav">two</a></p></div>',
+        )
+
+    def test_render_mixed_children(self):
+        # Leaves before and after a nested parent, and a leaf error inside a leaf-only parent
+        node = ParentNode(
+            "ul",
+            [
+                ParentNode(
+                    "li",
+                    [
+                        LeafNode(None, "a "),
+                        LeafNode("b", "b"),
+                        ParentNode("ul", [ParentNode("li", [LeafNode(None, "c")])]),
+                        LeafNode("i", "d"),
+                    ],
+                )
+            ],
+        )
+        self.assertEqual(render_html(node), "<ul><li>a <b>b</b><ul><li>c</li></ul><i>d</i></li></ul>")
+        with self.assertRaises(ValueError):
+            render_html(ParentNode("div", [ParentNode("p", [LeafNode("b", None)])]))
+
+    def test_render_other_node_types(self):
+        class Comment(HTMLNode):
+            __slots__ = ()
+
+            def to_html(self):
+                return f"<!-- {self.value} -->"
+
+        node = ParentNode("div", [Comment(value="note"), LeafNode(None, "text")])
+        self.assertEqual(render_html(node), "<div><!-- note -->text</div>")
+        self.assertEqual(render_html(LeafNode("i", "x")), "<i>x</i>")
+        with self.assertRaises(NotImplementedError):
+            render_html(ParentNode("div", [HTMLNode("p")]))
+
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("div", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            LeafNode("b", "x").extra = 1
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,113 @@
+import os
+import struct
+import unittest
+import zlib
+
+from block_cache import BlockCache
+from htmlnode import LeafNode, ParentNode
+from images import Image, ImagePipeline, annotate_images, image_size, variant_url
+from markdown_blocks import markdown_to_html_node
+from test_support import TempDirTestCase
+
+
+def png_bytes(width, height):
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    chunk = b"IHDR" + header
+    rows = b"".join(b"\x00" + b"\x80" * (3 * width) for _ in range(height))
+    data = b"IDAT" + zlib.compress(rows)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + struct.pack(">I", len(header)) + chunk + struct.pack(">I", zlib.crc32(chunk))
+        + struct.pack(">I", len(data) - 4) + data + struct.pack(">I", zlib.crc32(data))
+        + struct.pack(">I", 0) + b"IEND" + struct.pack(">I", zlib.crc32(b"IEND"))
+    )
+
+
+class TestImageSize(TempDirTestCase):
+    def test_formats(self):
+        self.assertEqual(image_size(self.write("a.png", png_bytes(30, 20))), (30, 20))
+        self.assertEqual(image_size(self.write("a.gif", b"GIF89a" + struct.pack("<HH", 7, 5) + b"\x00" * 16)), (7, 5))
+        jpeg = (
+            b"\xff\xd8"
+            + b"\xff\xe0" + struct.pack(">H", 6) + b"JFIF"
+            + b"\xff\xc0" + struct.pack(">HBHH", 11, 8, 40, 64) + b"\x03"
+        )
+        self.assertEqual(image_size(self.write("a.jpg", jpeg)), (64, 40))
+        self.assertIsNone(image_size(self.write("a.txt", b"not an image")))
+
+
+class TestAnnotateImages(unittest.TestCase):
+    def test_adds_attributes_and_lazy_loading(self):
+        node = ParentNode("p", [
+            LeafNode("img", "", {"src": "/a.png", "alt": "A"}),
+            ParentNode("b", [LeafNode("img", "", {"src": "/other.png", "alt": ""})]),
+        ])
+        annotate_images(node, {"/a.png": {"width": "10", "height": "5"}})
+        self.assertEqual(
+            node.to_html(),
+            '<p><img src="/a.png" alt="A" width="10" height="5" loading="lazy"></img>'
+            '<b><img src="/other.png" alt="" loading="lazy"></img></b></p>',
+        )
+
+    def test_markdown_with_images_bypasses_cache(self):
+        cache = BlockCache()
+        markdown = "![A](/a.png)\n\nText"
+        self.assertEqual(
+            markdown_to_html_node(markdown, cache).to_html(),
+            '<div><p><img src="/a.png" alt="A"></img></p><p>Text</p></div>',
+        )
+        self.assertEqual(
+            markdown_to_html_node(markdown, cache, {"/a.png": {"width": "10"}}).to_html(),
+            '<div><p><img src="/a.png" alt="A" width="10" loading="lazy"></img></p><p>Text</p></div>',
+        )
+
+    def test_variant_url(self):
+        self.assertEqual(variant_url("/images/a.b.png", 480), "/images/a.b-480w.png")
+
+
+class TestImagePipeline(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = self.path("static")
+        self.dest = self.path("docs")
+        self.cache = self.path("cache")
+        self.write(os.path.join(self.static, "images", "wide.png"), png_bytes(200, 100))
+
+    def run_pipeline(self):
+        pipeline = ImagePipeline(self.static, self.dest, self.cache, (50, 120, 400), workers=2)
+        changed = pipeline.run()
+        return pipeline, changed
+
+    def test_sizes_and_cache(self):
+        pipeline, _ = self.run_pipeline()
+        self.assertEqual(pipeline.processed, 1)
+        attributes = pipeline.attributes()["/images/wide.png"]
+        self.assertEqual((attributes["width"], attributes["height"]), ("200", "100"))
+        pipeline, changed = self.run_pipeline()
+        self.assertEqual((pipeline.processed, changed), (0, 0))
+
+    def test_srcset(self):
+        pipeline = ImagePipeline(self.static, self.dest, self.cache)
+        pipeline.entries["/i/a.png"] = {"width": 800, "height": 400, "variants": [(480, "x")]}
+        self.assertEqual(
+            pipeline.attributes()["/i/a.png"],
+            {"width": "800", "height": "400", "srcset": "/i/a-480w.png 480w, /i/a.png 800w"},
+        )
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_variants(self):
+        pipeline, changed = self.run_pipeline()
+        self.assertEqual(changed, 2)
+        self.assertEqual(
+            pipeline.attributes()["/images/wide.png"]["srcset"],
+            "/images/wide-50w.png 50w, /images/wide-120w.png 120w, /images/wide.png 200w",
+        )
+        self.assertEqual(image_size(os.path.join(self.dest, "images", "wide-120w.png")), (120, 60))
+        os.remove(os.path.join(self.static, "images", "wide.png"))
+        pipeline, changed = self.run_pipeline()
+        self.assertEqual((changed, pipeline.generated), (2, []))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "wide-120w.png")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -171,6 +171,21 @@ class TestInlineMarkdown(unittest.TestCase):
             new_nodes,
         )
 
+    def test_split_link_after_image_with_same_markup(self):
+        node = TextNode("![a](b) then [a](b)", TextType.TEXT)
+        self.assertListEqual(
+            [
+                TextNode("![a](b) then ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "b"),
+            ],
+            split_nodes_link([node]),
+        )
+
+    def test_split_keeps_empty_and_formatted_nodes(self):
+        nodes = [TextNode("", TextType.TEXT), TextNode("[a](b)", TextType.BOLD)]
+        self.assertListEqual(nodes, split_nodes_link(nodes))
+        self.assertListEqual(nodes, split_nodes_image(nodes))
+
     def test_text_to_textnodes(self):
         nodes = text_to_textnodes(
             "This is **text** with an _italic_ word and a `code block` and an ![image](https://i.imgur.com/zjjcJKZ.png) and a [link](https://boot.dev)"
@@ -191,6 +206,28 @@ class TestInlineMarkdown(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_matches_chained_passes(self):
+        texts = [
+            "",
+            "**bold with _underscores_ and `ticks`** then _italic `tick`_",
+            "![img](/a.png)[link](/b) and [x](y)![z](w)",
+            "[link](/url![image](/src))",
+            " ".join(f"[link {i}](/page/{i}) and ![img {i}](/img/{i}.png)" for i in range(50)),
+        ]
+        for text in texts:
+            nodes = [TextNode(text, TextType.TEXT)]
+            nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+            nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+            nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+            nodes = split_nodes_image(nodes)
+            nodes = split_nodes_link(nodes)
+            self.assertListEqual(nodes, text_to_textnodes(text))
+
+    def test_text_to_textnodes_unclosed(self):
+        for text in ["**bold", "_a **b** c_", "`code _x_ more`", "a _b"]:
+            with self.assertRaises(ValueError):
+                text_to_textnodes(text)
+
 
 if __name__ == "__main__":
     unittest.main()
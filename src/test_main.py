@@ -1,5 +1,13 @@
+import contextlib
+import io
+import os
 import unittest
-from main import extract_title
+from main import extract_title, generate_pages_recursive, parse_args, resolve_workers
+import pages
+from pages import PagePool, balance_chunks
+from template import load_template
+from manifest import BuildManifest
+from test_support import TempDirTestCase
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -45,5 +53,169 @@ class TestExtractTitle(unittest.TestCase):
         self.assertEqual(result, "This is a title with multiple hashes")
 
 
+class TestParseArgs(unittest.TestCase):
+    def test_rejects_invalid_counts(self):
+        for argv in (["-j", "-1"], ["--block-cache-size", "0"], ["--shard-index", "1", "--shard-count", "1"]):
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                parse_args(argv)
+        self.assertEqual(parse_args(["-j", "0"]).workers, 0)
+
+
+class TestIncrementalBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.dest = self.path("docs")
+        self.template = self.path("template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+
+    def build(self, manifest, base_path="/"):
+        generate_pages_recursive(self.content, self.template, self.dest, base_path, manifest)
+
+    def test_rerenders_only_changed_pages(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        index_html = os.path.join(self.dest, "index.html")
+        post_html = os.path.join(self.dest, "blog", "post.html")
+        self.write(index_html, "untouched")
+        self.write(post_html, "untouched")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Edited")
+        self.build(manifest)
+        self.assertEqual(self.read(index_html), "untouched")
+        self.assertEqual(
+            self.read(post_html), "<title>Edited</title><div><h1>Edited</h1></div>"
+        )
+
+    def test_template_or_base_path_change_rerenders_all(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        index_html = os.path.join(self.dest, "index.html")
+        self.write(index_html, "untouched")
+        self.build(manifest, "/site/")
+        self.assertNotEqual(self.read(index_html), "untouched")
+        self.write(index_html, "untouched")
+        self.write(self.template, "{{ Content }}")
+        self.build(manifest, "/site/")
+        self.assertEqual(self.read(index_html), "<div><h1>Home</h1></div>")
+
+    def test_renderer_change_rerenders_all(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        index_html = os.path.join(self.dest, "index.html")
+        self.write(index_html, "untouched")
+        self.build(manifest)
+        self.assertEqual(self.read(index_html), "untouched")
+        # Stands in for an edit to the renderer's code
+        self.addCleanup(setattr, pages, "RENDERER_MODULES", pages.RENDERER_MODULES)
+        pages.RENDERER_MODULES = pages.RENDERER_MODULES[:-1]
+        self.build(manifest)
+        self.assertEqual(self.read(index_html), "<title>Home</title><div><h1>Home</h1></div>")
+
+    def test_removes_outputs_of_deleted_sources(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        os.rmdir(os.path.join(self.content, "blog"))
+        self.build(manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+        self.assertEqual(list(manifest.pages), [os.path.join(self.dest, "index.html").replace(os.sep, "/")])
+
+    def test_front_matter_and_drafts(self):
+        manifest = BuildManifest()
+        post = os.path.join(self.content, "blog", "post.md")
+        post_html = os.path.join(self.dest, "blog", "post.html")
+        self.write(post, "---\ntitle: Front\ntags: [a, b]\n---\n# Post\n\nBody")
+        self.build(manifest)
+        self.assertEqual(
+            self.read(post_html), "<title>Front</title><div><h1>Post</h1><p>Body</p></div>"
+        )
+        self.write(post, "+++\ndraft = true\n+++\n# Post")
+        self.build(manifest)
+        self.assertFalse(os.path.exists(post_html))
+        generate_pages_recursive(self.content, self.template, self.dest, "/", manifest, drafts=True)
+        self.assertEqual(self.read(post_html), "<title>Post</title><div><h1>Post</h1></div>")
+
+
+class TestParallelBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.template = self.path("template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(6):
+            self.write(os.path.join(self.content, f"page{i}.md"), f"# Page {i}\n\nSee [home](/) and **item {i}**")
+
+    def build(self, dest, workers, io_depth=0):
+        generate_pages_recursive(self.content, self.template, dest, "/base/", workers=workers, io_depth=io_depth)
+        pages = {}
+        for name in sorted(os.listdir(dest)):
+            pages[name] = self.read(os.path.join(dest, name))
+        return pages
+
+    def test_parallel_matches_serial(self):
+        serial = self.build(self.path("serial"), 1)
+        parallel = self.build(self.path("parallel"), 3)
+        self.assertEqual(len(serial), 6)
+        self.assertEqual(serial, parallel)
+
+    def test_pipelined_io_matches_serial(self):
+        serial = self.build(self.path("serial"), 1)
+        pipelined = self.build(self.path("pipelined"), 1, io_depth=2)
+        self.assertEqual(serial, pipelined)
+
+    def test_rebuild_leaves_unchanged_pages_untouched(self):
+        dest = self.path("site")
+        self.build(dest, 1)
+        page = os.path.join(dest, "page1.html")
+        os.utime(page, ns=(0, 0))
+        with open(os.path.join(self.content, "page3.md"), "a", encoding="utf-8") as file:
+            file.write(" more")
+        for workers in (1, 3):
+            written = generate_pages_recursive(self.content, self.template, dest, "/base/", workers=workers)
+            self.assertEqual(written, 1 if workers == 1 else 0)
+        self.assertEqual(os.stat(page).st_mtime_ns, 0)
+
+    def test_parallel_propagates_page_errors(self):
+        for i in (2, 4):
+            self.write(os.path.join(self.content, f"page{i}.md"), f"# Page {i}\n\nunclosed **bold {i}")
+        with self.assertRaises(ValueError) as context:
+            self.build(self.path("parallel"), 3)
+        self.assertEqual(str(context.exception), "invalid markdown, formatted section not closed")
+
+    def test_balance_chunks_largest_first(self):
+        pages = []
+        for i, size in enumerate((10, 400, 30, 20, 40)):
+            pages.append((self.write(f"sized{i}.md", "x" * size), f"sized{i}.html"))
+        chunks = balance_chunks(pages, 4)
+        self.assertEqual([[index for index, _, _ in chunk] for chunk in chunks], [[1], [4, 2, 3, 0]])
+
+    def test_page_pool_renders_batches_with_one_pool(self):
+        dest = self.path("pooled")
+        os.makedirs(dest)
+        pages = [
+            (os.path.join(self.content, f"page{i}.md"), os.path.join(dest, f"page{i}.html")) for i in range(6)
+        ]
+        template = load_template(self.template, "/base/")
+        with PagePool(template, self.template, "/base/", 2) as pool:
+            first = list(pool.render(pages[:3]))
+            second = list(pool.render(pages[3:]))
+        self.assertEqual([changed for _, _, changed in first + second], [True] * 6)
+        self.assertEqual(
+            [(record["event"], record["path"]) for record in second[1][0]],
+            [("page_read", pages[4][0]), ("page_written", pages[4][1])],
+        )
+        self.assertEqual(self.build(self.path("serial"), 1), self.build(dest, 1))
+
+    def test_resolve_workers(self):
+        self.assertEqual(resolve_workers(4), 4)
+        self.assertGreaterEqual(resolve_workers(0), 1)
+        with self.assertRaises(ValueError):
+            resolve_workers(-1)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
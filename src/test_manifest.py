@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest, hash_file
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.output = os.path.join(self.tmp.name, "index.html")
+        with open(self.output, "w", encoding="utf-8") as file:
+            file.write("<p>hi</p>")
+
+    def test_is_current(self):
+        manifest = BuildManifest()
+        manifest.record(self.output, "content/index.md", "abc", "tpl", "/")
+        self.assertTrue(manifest.is_current(self.output, "abc", "tpl", "/"))
+        self.assertFalse(manifest.is_current(self.output, "abd", "tpl", "/"))
+        self.assertFalse(manifest.is_current(self.output, "abc", "tpl2", "/"))
+        self.assertFalse(manifest.is_current(self.output, "abc", "tpl", "/blog/"))
+
+    def test_missing_output_is_not_current(self):
+        manifest = BuildManifest()
+        manifest.record(self.output, "content/index.md", "abc", "tpl", "/")
+        os.remove(self.output)
+        self.assertFalse(manifest.is_current(self.output, "abc", "tpl", "/"))
+
+    def test_save_and_load(self):
+        path = os.path.join(self.tmp.name, "manifest.json")
+        manifest = BuildManifest()
+        manifest.record(self.output, "content/index.md", "abc", "tpl", "/")
+        manifest.record_asset("docs/index.css", "static/index.css", 10, 123)
+        manifest.save(path)
+        loaded = BuildManifest.load(path)
+        self.assertEqual(loaded.pages, manifest.pages)
+        self.assertEqual(loaded.assets, manifest.assets)
+
+    def test_load_missing_or_corrupt(self):
+        path = os.path.join(self.tmp.name, "manifest.json")
+        self.assertEqual(BuildManifest.load(path).pages, {})
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("{not json")
+        self.assertEqual(BuildManifest.load(path).pages, {})
+
+    def test_stale_outputs(self):
+        manifest = BuildManifest()
+        manifest.record("docs/a.html", "content/a.md", "1", "t", "/")
+        manifest.record("docs/b.html", "content/b.md", "2", "t", "/")
+        self.assertEqual(manifest.stale_outputs(["docs/a.html"]), ["docs/b.html"])
+
+    def test_hash_file(self):
+        self.assertEqual(hash_file(self.output), hash_file(self.output))
+        other = os.path.join(self.tmp.name, "other.html")
+        with open(other, "w", encoding="utf-8") as file:
+            file.write("<p>bye</p>")
+        self.assertNotEqual(hash_file(self.output), hash_file(other))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,15 @@
 import unittest
-from markdown_blocks import markdown_to_blocks, block_to_block_type, BlockType
+import io
+from markdown_blocks import (
+    markdown_to_blocks,
+    block_to_block_type,
+    BlockType,
+    Block,
+    iter_blocks,
+    iter_blocks_html,
+    lex_blocks,
+    markdown_to_html_node,
+)
 
 
 class TestMarkdownToHTML(unittest.TestCase):
@@ -60,6 +70,31 @@ This is the same paragraph on a new line
         block = "paragraph"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_iter_blocks_line_ranges(self):
+        md = "# Title\n\n  \nfirst line\nsecond line  \n\n\n```\ncode\n```\n"
+        blocks = list(iter_blocks(io.StringIO(md)))
+        self.assertEqual(
+            blocks,
+            [
+                Block("# Title", BlockType.HEADING, 1, 1),
+                Block("first line\nsecond line", BlockType.PARAGRAPH, 4, 5),
+                Block("```\ncode\n```", BlockType.CODE, 8, 10),
+            ],
+        )
+
+    def test_lex_blocks_matches_split(self):
+        for md in ("", "\n", "\n\n", "\n\n\n", "a\n\n\n", "a\n\n\n\n", " \n \n\nb", "a\n \nb"):
+            blocks = [
+                block.strip() for block in md.split("\n\n") if block != ""
+            ]
+            self.assertEqual(markdown_to_blocks(md), blocks, repr(md))
+            self.assertEqual([block.block_type for block in lex_blocks(md)], [block_to_block_type(block) for block in blocks])
+
+    def test_iter_blocks_html(self):
+        md = "# Title\n\nSome **bold** text\n\n- one\n- two\n\n> quote\n"
+        html = "".join(iter_blocks_html(iter_blocks(io.StringIO(md))))
+        self.assertEqual(html, markdown_to_html_node(md).to_html())
+
 
 if __name__ == "__main__":
     unittest.main()
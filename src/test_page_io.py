@@ -0,0 +1,71 @@
+import os
+import unittest
+
+from page_io import PageWriter, open_source_lines, prefetch, write_page
+from test_support import TempDirTestCase
+
+
+class TestPageIO(TempDirTestCase):
+    def test_prefetch_yields_in_order(self):
+        paths = []
+        for i in range(10):
+            write_page(self.path(f"{i}.md"), [f"page {i}"])
+            paths.append(self.path(f"{i}.md"))
+        self.assertEqual(list(prefetch(paths, depth=3)), [(path, f"page {i}") for i, path in enumerate(paths)])
+
+    def test_prefetch_raises_for_missing_file_in_turn(self):
+        write_page(self.path("a.md"), ["a"])
+        sources = prefetch([self.path("a.md"), self.path("missing.md")], depth=2)
+        self.assertEqual(next(sources), (self.path("a.md"), "a"))
+        with self.assertRaises(FileNotFoundError):
+            next(sources)
+
+    def test_write_page_skips_identical_content(self):
+        path = self.path("page.html")
+        self.assertTrue(write_page(path, ["<p>", "same", "</p>"]))
+        os.utime(path, ns=(0, 0))
+        self.assertFalse(write_page(path, ["<p>same", "</p>"]))
+        self.assertEqual(os.stat(path).st_mtime_ns, 0)
+        for fragments in (["<p>same</p>", "!"], ["<p>same"], ["<p>", "diff", "</p>"], []):
+            self.assertTrue(write_page(path, fragments))
+            self.assertEqual(self.read("page.html"), "".join(fragments))
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_open_source_lines_matches_text_mode(self):
+        path = self.path("page.md")
+        for text in ("", "\n", "# Title\n\n\nbody ünïcode\n  \nlast", "a\r\nb\rc\n", "ends\n\n"):
+            with open(path, "w", encoding="utf-8", newline="") as file:
+                file.write(text)
+            with open(path, "r", encoding="utf-8") as file:
+                expected = list(file)
+            for threshold in (0, 1 << 30):
+                with open_source_lines(path, threshold) as lines:
+                    self.assertEqual(list(lines), expected, (text, threshold))
+
+    def test_open_source_lines_can_stop_early(self):
+        path = self.path("page.md")
+        write_page(path, ["first\n", "second\n"])
+        with open_source_lines(path, 0) as lines:
+            self.assertEqual(next(lines), "first\n")
+
+    def test_page_writer_writes_every_page(self):
+        with PageWriter(max_pending=2, batch_size=3) as writer:
+            for i in range(20):
+                writer.write(self.path(f"{i}.html"), f"<p>{i}</p>")
+        self.assertEqual(writer.written, 20)
+        with PageWriter() as writer:
+            writer.write(self.path("0.html"), "<p>0</p>")
+        self.assertEqual((writer.written, writer.unchanged), (0, 1))
+        self.assertGreaterEqual(writer.batches, 1)
+        self.assertEqual(self.read("19.html"), "<p>19</p>")
+        self.assertEqual(sorted(os.listdir(self.tmp.name))[:2], ["0.html", "1.html"])
+
+    def test_page_writer_raises_failed_write(self):
+        writer = PageWriter()
+        writer.write(self.path(os.path.join("missing", "a.html")), "<p>a</p>")
+        with self.assertRaises(FileNotFoundError):
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import markdown_blocks
+from pages import generate_pages_recursive
+from profiler import BuildProfiler, NULL_PROFILER
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_nested_stages_self_time(self):
+        profiler = BuildProfiler()
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                time.sleep(0.01)
+        stages = profiler.report()["stages"]
+        self.assertEqual(stages["outer"]["calls"], 1)
+        self.assertGreaterEqual(stages["inner"]["self_seconds"], 0.01)
+        self.assertGreaterEqual(stages["outer"]["total_seconds"], stages["inner"]["total_seconds"])
+        self.assertLess(stages["outer"]["self_seconds"], stages["inner"]["self_seconds"])
+
+    def test_page_stages_and_counters(self):
+        profiler = BuildProfiler()
+        with profiler.page("a.md"):
+            with profiler.stage("read"):
+                pass
+        profiler.count("chars_read", 10)
+        report = profiler.report()
+        self.assertEqual(report["pages"][0]["path"], "a.md")
+        self.assertIn("read", report["pages"][0]["stages"])
+        self.assertEqual(report["counters"], {"chars_read": 10, "pages": 1})
+
+    def test_instrument_restores_functions(self):
+        original = markdown_blocks.block_to_html_node
+        profiler = BuildProfiler()
+        with profiler.instrument():
+            self.assertIsNot(markdown_blocks.block_to_html_node, original)
+            markdown_blocks.markdown_to_html_node("# Title\n\nSome **text**")
+        self.assertIs(markdown_blocks.block_to_html_node, original)
+        stages = profiler.report()["stages"]
+        self.assertEqual(stages["block_to_html_node"]["calls"], 2)
+        self.assertEqual(stages["inline"]["calls"], 2)
+
+    def test_iterate_charges_each_item(self):
+        def slow_items():
+            for item in range(3):
+                time.sleep(0.005)
+                yield item
+
+        profiler = BuildProfiler()
+        with profiler.stage("consumer"):
+            self.assertEqual(list(profiler.iterate("producer", slow_items())), [0, 1, 2])
+        stages = profiler.report()["stages"]
+        self.assertEqual(stages["producer"]["calls"], 4)
+        self.assertGreaterEqual(stages["producer"]["self_seconds"], 0.015)
+        self.assertLess(stages["consumer"]["self_seconds"], stages["producer"]["self_seconds"])
+        items = [1, 2]
+        self.assertIs(NULL_PROFILER.iterate("producer", items), items)
+
+    def test_merge(self):
+        worker = BuildProfiler()
+        with worker.page("a.md"), worker.stage("parse"):
+            pass
+        profiler = BuildProfiler()
+        with profiler.stage("parse"):
+            pass
+        profiler.merge(worker.report())
+        report = profiler.report()
+        self.assertEqual(report["stages"]["parse"]["calls"], 2)
+        self.assertEqual([page["path"] for page in report["pages"]], ["a.md"])
+        self.assertEqual(report["counters"]["pages"], 1)
+
+    def test_profiled_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w", encoding="utf-8") as file:
+                file.write("{{ Content }}")
+            for name in ("a", "b"):
+                with open(os.path.join(content, f"{name}.md"), "w", encoding="utf-8") as file:
+                    file.write(f"# {name}\n\ntext")
+            profiler = BuildProfiler()
+            generate_pages_recursive(content, template, os.path.join(tmp, "docs"), "/", profiler=profiler)
+            path = os.path.join(tmp, "profile.json")
+            profiler.write_json(path)
+            with open(path, "r", encoding="utf-8") as file:
+                report = json.load(file)
+            with open(os.path.join(tmp, "docs", "a.html"), "r", encoding="utf-8") as file:
+                self.assertEqual(file.read(), "<div><h1>a</h1><p>text</p></div>")
+        self.assertEqual(report["counters"]["pages"], 2)
+        for stage in ("read", "front_matter", "write"):
+            self.assertEqual(report["stages"][stage]["calls"], 2)
+        # Streamed stages are timed once per item pulled, plus the final pull
+        self.assertEqual(report["stages"]["parse"]["calls"], 2 * 3)
+        self.assertEqual(report["stages"]["inline"]["calls"], 4)
+        for stage in ("to_html", "template"):
+            self.assertGreater(report["stages"][stage]["calls"], 2)
+        self.assertLessEqual({"read", "parse", "to_html", "template", "write"}, set(report["pages"][0]["stages"]))
+        self.assertIn("Slowest 2 page(s):", profiler.format_summary())
+
+    def test_null_profiler(self):
+        with NULL_PROFILER.page("a.md"), NULL_PROFILER.stage("read"):
+            NULL_PROFILER.count("pages")
+        self.assertFalse(NULL_PROFILER.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import email.utils
+import os
+import unittest
+
+from serve import DevServer
+from test_support import TempDirTestCase
+
+
+class TestDevServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.static = self.path("static")
+        self.template = self.path("template.html")
+        os.makedirs(os.path.join(self.content, "blog", "post"))
+        os.makedirs(self.static)
+        self.write(self.template, '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nSome **text**")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.server = DevServer(self.content, self.static, self.template, "/site/")
+
+    def test_resolve(self):
+        post = os.path.join(self.content, "blog", "post", "index.md")
+        self.assertEqual(self.server.resolve("/site/"), ("page", os.path.join(self.content, "index.md")))
+        self.assertEqual(self.server.resolve("/site/blog/post/"), ("page", post))
+        self.assertEqual(self.server.resolve("/site/blog/post?x=1"), ("page", post))
+        self.assertEqual(self.server.resolve("/site/blog/post/index.html"), ("page", post))
+        self.assertEqual(self.server.resolve("/site/index.css"), ("static", os.path.join(self.static, "index.css")))
+        self.assertIsNone(self.server.resolve("/site/missing/"))
+        self.assertIsNone(self.server.resolve("/site/../template.html"))
+
+    def test_renders_pages_once_until_changed(self):
+        status, headers, body = self.server.respond("/site/blog/post/", {})
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            body.decode("utf-8"), '<title>Post</title><a href="/site/">home</a><div><h1>Post</h1><p>Some <b>text</b></p></div>'
+        )
+        self.server.respond("/site/blog/post/", {})
+        self.assertEqual(self.server.renders, 1)
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nEdited", 10**18)
+        status, _, body = self.server.respond("/site/blog/post/", {"If-None-Match": headers["ETag"]})
+        self.assertEqual(status, 200)
+        self.assertIn(b"<p>Edited</p>", body)
+        self.assertEqual(self.server.renders, 2)
+
+    def test_template_change_rerenders(self):
+        self.server.respond("/site/", {})
+        self.write(self.template, "<main>{{ Content }}</main>", 10**18)
+        status, _, body = self.server.respond("/site/", {})
+        self.assertEqual(body, b"<main><div><h1>Home</h1><p>Welcome</p></div></main>")
+
+    def test_conditional_requests(self):
+        self.write(os.path.join(self.static, "index.css"), "body {}", 1_700_000_000 * 10**9)
+        status, headers, body = self.server.respond("/site/index.css", {})
+        self.assertEqual((status, body), (200, b"body {}"))
+        self.assertEqual(headers["Content-Type"], "text/css")
+        self.assertEqual(self.server.respond("/site/index.css", {"If-None-Match": headers["ETag"]})[0], 304)
+        self.assertEqual(self.server.respond("/site/index.css", {"If-None-Match": '"other"'})[0], 200)
+        since = email.utils.formatdate(1_700_000_000, usegmt=True)
+        self.assertEqual(self.server.respond("/site/index.css", {"If-Modified-Since": since})[0], 304)
+        earlier = email.utils.formatdate(1_600_000_000, usegmt=True)
+        self.assertEqual(self.server.respond("/site/index.css", {"If-Modified-Since": earlier})[0], 200)
+        _, page_headers, _ = self.server.respond("/site/", {})
+        self.assertEqual(self.server.respond("/site/", {"If-None-Match": page_headers["ETag"]})[0], 304)
+
+    def test_errors(self):
+        self.assertEqual(self.server.respond("/site/nothing.html", {})[0], 404)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nunclosed **bold", 10**18)
+        status, _, body = self.server.respond("/site/", {})
+        self.assertEqual(status, 500)
+        self.assertIn(b"not closed", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import unittest
+
+from manifest import BuildManifest
+from pages import generate_pages_recursive, shard_pages
+from shards import SHARD_MANIFEST, merge_shards, shard_dir
+from test_support import TempDirTestCase
+
+
+class TestShardPages(TempDirTestCase):
+    def page(self, name, size):
+        return self.write(name, "x" * size), name.replace(".md", ".html")
+
+    def test_partition_is_complete_and_balanced(self):
+        pages = [self.page(f"page{i}.md", size) for i, size in enumerate([10, 60, 40, 50, 30, 20, 0, 0])]
+        shards = [shard_pages(pages, index, 3) for index in range(3)]
+        self.assertEqual(sorted(page for shard in shards for page in shard), sorted(pages))
+        sizes = [sum(os.path.getsize(from_path) for from_path, _ in shard) for shard in shards]
+        self.assertEqual(sizes, [70, 70, 70])
+        # Pages keep their order and empty pages are spread out
+        self.assertEqual(shards[0], [pages[0], pages[1], pages[6]])
+        self.assertEqual(shards, [shard_pages(list(reversed(pages)), index, 3)[::-1] for index in range(3)])
+
+    def test_invalid_shard(self):
+        with self.assertRaises(ValueError):
+            shard_pages([], 2, 2)
+
+
+class TestMergeShards(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.template = self.path("template.html")
+        self.shards = self.path("shards")
+        self.dest = self.path("docs")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(5):
+            self.write(os.path.join(self.content, "blog", f"post{i}.md"), f"# Post {i}\n\n" + "text " * i)
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+
+    def build_shards(self, count):
+        for index in range(count):
+            directory = shard_dir(self.shards, index)
+            manifest_path = os.path.join(directory, SHARD_MANIFEST)
+            manifest = BuildManifest.load(manifest_path)
+            generate_pages_recursive(
+                self.content, self.template, directory, "/", manifest, shard=(index, count)
+            )
+            manifest.save(manifest_path)
+        return [shard_dir(self.shards, index) for index in range(count)]
+
+    def merge(self, shard_dirs, manifest):
+        return merge_shards(shard_dirs, self.dest, manifest)
+
+    def tree(self, root):
+        files = {}
+        for dir_path, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(dir_path, name)
+                files[os.path.relpath(path, root)] = self.read(path)
+        return files
+
+    def test_merge_matches_unsharded_build(self):
+        manifest = BuildManifest()
+        outputs, merged, removed = self.merge(self.build_shards(3), manifest)
+        self.assertEqual((len(outputs), len(merged), removed), (6, 6, 0))
+        plain = self.path("plain")
+        plain_manifest = BuildManifest()
+        generate_pages_recursive(self.content, self.template, plain, "/", plain_manifest)
+        self.assertEqual(self.tree(self.dest), self.tree(plain))
+        self.assertEqual(
+            {key[len(self.dest):]: entry for key, entry in manifest.pages.items()},
+            {key[len(plain):]: entry for key, entry in plain_manifest.pages.items()},
+        )
+
+    def test_incremental_merge(self):
+        manifest = BuildManifest()
+        self.merge(self.build_shards(2), manifest)
+        os.remove(os.path.join(self.content, "blog", "post3.md"))
+        self.write(os.path.join(self.content, "blog", "post1.md"), "# Edited")
+        _, merged, removed = self.merge(self.build_shards(2), manifest)
+        # post0.html moved to the other shard, which rendered it anew
+        self.assertEqual(sorted(os.path.basename(dest) for _, dest in merged), ["post0.html", "post1.html"])
+        self.assertEqual(removed, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post3.html")))
+
+    def test_missing_or_overlapping_shards(self):
+        shard_dirs = self.build_shards(2)
+        with self.assertRaises(FileNotFoundError):
+            self.merge(shard_dirs + [shard_dir(self.shards, 2)], BuildManifest())
+        with self.assertRaises(ValueError):
+            self.merge(shard_dirs + shard_dirs[:1], BuildManifest())
+
+
+if __name__ == "__main__":
+    unittest.main()
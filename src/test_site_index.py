@@ -0,0 +1,133 @@
+import os
+import unittest
+
+from pages import generate_pages_recursive
+from site_index import SiteIndex, slugify, tag_slugs, url_for
+from test_support import TempDirTestCase
+
+
+class TestSiteIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.dest = self.path("docs")
+        self.template = self.path("template.html")
+        self.index_path = self.path("index.json")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/about.md", "# About\n\nUs")
+        self.write("content/blog/first/index.md", "---\ndate: 2020-09-13\n---\n# First & Best\n\nOne")
+        self.write("content/blog/second.md", "---\ndate: 2023-11-14T22:13:20Z\n---\n# Second\n\nTwo")
+
+    def read(self, name):
+        return super().read(os.path.join(self.dest, name))
+
+    def build(self, site_index):
+        generate_pages_recursive(self.content, self.template, self.dest, "/", site_index=site_index)
+        changed = site_index.write_pages(self.template, "/site/", "https://example.org")
+        site_index.save(self.index_path)
+        return changed
+
+    def test_url_for_and_slugify(self):
+        self.assertEqual(url_for("index.html"), "/")
+        self.assertEqual(url_for("blog/first/index.html"), "/blog/first/")
+        self.assertEqual(url_for("blog/second.html"), "/blog/second.html")
+        self.assertEqual(slugify("Middle Earth!"), "middle-earth")
+
+    def test_collects_titles_and_sections(self):
+        site_index = SiteIndex(self.dest)
+        self.build(site_index)
+        self.assertEqual(site_index.entries["blog/first/index.html"]["title"], "First & Best")
+        self.assertEqual(site_index.entries["blog/first/index.html"]["updated"], "2020-09-13T00:00:00Z")
+        self.assertEqual(
+            [entry["url"] for entry in site_index.sections()["blog"]], ["/blog/second.html", "/blog/first/"]
+        )
+        self.assertEqual(list(site_index.sections()), ["blog"])
+        self.assertEqual(
+            self.read("blog/index.html"),
+            '<title>Blog</title><div><h1>Blog</h1><ul><li><a href="/site/blog/second.html">Second</a></li>'
+            '<li><a href="/site/blog/first/">First &amp; Best</a></li></ul></div>',
+        )
+        feed = self.read("feed.xml")
+        self.assertIn("<title>Home</title>", feed)
+        self.assertIn("<title>First &amp; Best</title>", feed)
+        self.assertIn('<link href="https://example.org/site/blog/second.html" />', feed)
+        self.assertIn("<updated>2023-11-14T22:13:20Z</updated>", feed)
+        self.assertEqual(site_index.generated, ["blog/index.html", "feed.xml"])
+
+    def test_incremental_update_in_place(self):
+        site_index = SiteIndex(self.dest)
+        self.build(site_index)
+        self.assertEqual(self.build(SiteIndex.load(self.index_path, self.dest)), 0)
+        os.remove(os.path.join(self.content, "blog", "second.md"))
+        self.write("content/blog/index.md", "# My Blog\n\nHand written")
+        site_index = SiteIndex.load(self.index_path, self.dest)
+        self.build(site_index)
+        self.assertNotIn("blog/second.html", site_index.entries)
+        self.assertEqual(site_index.entries["blog/index.html"]["title"], "My Blog")
+        self.assertEqual(site_index.generated, ["feed.xml"])
+        self.assertIn("Hand written", self.read("blog/index.html"))
+        self.assertNotIn("second", self.read("feed.xml"))
+
+    def test_updated_ignores_modification_time(self):
+        self.write("content/blog/undated.md", "# Undated")
+        site_index = SiteIndex(self.dest)
+        self.build(site_index)
+        feed = self.read("feed.xml")
+        self.assertEqual(site_index.entries["blog/undated.html"]["updated"], "1970-01-01T00:00:00Z")
+        os.utime(os.path.join(self.content, "blog", "undated.md"), (1_600_000_000, 1_600_000_000))
+        self.build(SiteIndex(self.dest))
+        self.assertEqual(self.read("feed.xml"), feed)
+
+    def test_fields_from_front_matter(self):
+        self.write("content/blog/second.md", "---\ntitle: Renamed\ndate: 2024-01-02\ntags: [Elves]\n---\n# Second")
+        site_index = SiteIndex(self.dest)
+        self.build(site_index)
+        entry = site_index.entries["blog/second.html"]
+        self.assertEqual(entry["title"], "Renamed")
+        self.assertEqual(entry["updated"], "2024-01-02T00:00:00Z")
+        self.assertIn('<a href="/site/blog/second.html">Renamed</a>', self.read("tags/elves/index.html"))
+
+    def test_tag_pages_and_stale_tags(self):
+        site_index = SiteIndex(self.dest)
+        self.build(site_index)
+        site_index.entries["blog/second.html"]["fields"]["tags"] = ["Elves", "Rings"]
+        site_index.write_pages(self.template, "/", "https://example.org")
+        self.assertIn('<a href="/blog/second.html">Second</a>', self.read("tags/elves/index.html"))
+        self.assertIn('<a href="/tags/rings/">Rings</a>', self.read("tags/index.html"))
+        self.assertIn('<category term="Elves" />', self.read("feed.xml"))
+        site_index.entries["blog/second.html"]["fields"]["tags"] = ["Elves"]
+        site_index.write_pages(self.template, "/", "https://example.org")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "tags", "rings")))
+
+    def test_colliding_tag_slugs(self):
+        slugs = tag_slugs(["C", "C#", "C++", "c", "Rust"])
+        self.assertEqual(slugs["c"], "c")
+        self.assertEqual(slugs["Rust"], "rust")
+        self.assertEqual(len(set(slugs.values())), 5)
+        self.assertTrue(all(slugs[tag].startswith("c-") for tag in ("C", "C#", "C++")))
+
+        self.write("content/blog/second.md", "---\ntags: [C, C++, C#]\n---\n# Second")
+        site_index = SiteIndex(self.dest)
+        self.build(site_index)
+        tag_index = self.read("tags/index.html")
+        for tag in ("C", "C++", "C#"):
+            url = f"/tags/{tag_slugs(['C', 'C++', 'C#'])[tag]}/"
+            self.assertEqual(tag_index.count(f'href="/site{url}"'), 1)
+            self.assertIn(f"Tagged: {tag}", self.read(url.strip("/") + "/index.html"))
+
+    def test_no_feed_without_site_url(self):
+        site_index = SiteIndex(self.dest)
+        self.build(site_index)
+        site_index.write_pages(self.template, "/", "")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "feed.xml")))
+        self.assertEqual(site_index.generated, ["blog/index.html"])
+
+    def test_load_missing_or_outdated(self):
+        self.assertEqual(SiteIndex.load(self.index_path, self.dest).entries, {})
+        self.write("index.json", '{"version": 0, "entries": {"a": {}}}')
+        self.assertEqual(SiteIndex.load(self.index_path, self.dest).entries, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
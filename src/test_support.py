@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    """
+    Test case with a temporary directory, self.tmp, that is removed after each
+    test, and helpers for the files in it. Relative paths are taken relative
+    to the temporary directory.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, *names):
+        return os.path.join(self.tmp.name, *names)
+
+    def write(self, path, data, mtime_ns=None):
+        """
+        Writes text or bytes to path, creating its directory, and returns the path.
+        """
+        path = self.path(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(data, bytes):
+            with open(path, "wb") as file:
+                file.write(data)
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(data)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def read(self, path):
+        with open(self.path(path), "r", encoding="utf-8") as file:
+            return file.read()
@@ -0,0 +1,58 @@
+import unittest
+
+from template import Template, rewrite_links
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_splits_segments_and_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(template.segments, ["<title>", "</title><main>", "</main>"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>body</p>"),
+            "<title>Hi</title><p>body</p>",
+        )
+
+    def test_render_repeated_and_missing_placeholders(self):
+        template = Template("{{ Title }}|{{ Title }}|{{ Footer }}")
+        self.assertEqual(template.render(Title="T"), "T|T|{{ Footer }}")
+
+    def test_render_rewrites_links_for_base_path(self):
+        template = Template(
+            '<link href="/index.css" />{{ Content }}', "/static-site-generator/"
+        )
+        self.assertEqual(
+            template.render(Content='<a href="/blog">x</a><img src="/a.png"></img>'),
+            '<link href="/static-site-generator/index.css" />'
+            '<a href="/static-site-generator/blog">x</a>'
+            '<img src="/static-site-generator/a.png"></img>',
+        )
+
+    def test_rewrite_links_srcset(self):
+        html = '<img src="/a.png" srcset="/a-480w.png 480w, https://cdn/a.png 800w">'
+        self.assertEqual(
+            rewrite_links(html, "/site/"),
+            '<img src="/site/a.png" srcset="/site/a-480w.png 480w, https://cdn/a.png 800w">',
+        )
+
+    def test_rewrite_links_root_base_path(self):
+        html = '<a href="/blog">x</a>'
+        self.assertEqual(rewrite_links(html, "/"), html)
+
+    def test_iter_render_streams_fragments(self):
+        template = Template("<main>{{ Content }}</main>", "/base/")
+        fragments = list(template.iter_render(Content=iter(['<a href="/x">', "x", "</a>"])))
+        self.assertEqual(
+            fragments, ["<main>", '<a href="/base/x">', "x", "</a>", "</main>"]
+        )
+
+    def test_iter_render_repeated_streamed_slot(self):
+        template = Template("{{ Content }}|{{ Content }}")
+        self.assertEqual(template.render(Content=iter(["a", "b"])), "ab|ab")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import gzip
+import os
+import unittest
+
+from build_log import log
+from compress import COMPRESSORS
+from images import ImagePipeline
+from manifest import BuildManifest
+from pages import page_template_hash
+from site_index import SiteIndex
+from test_images import png_bytes
+from test_support import TempDirTestCase
+from watch import SiteWatcher
+
+
+class TestSiteWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.static = self.path("static")
+        self.dest = self.path("docs")
+        self.template = self.path("template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.manifest = BuildManifest()
+        self.watcher = SiteWatcher(
+            self.content, self.static, self.template, self.dest, "/", self.manifest
+        )
+
+    def write(self, path, data):
+        super().write(path, data)
+        # Make sure the change is visible even on coarse mtime filesystems
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        return path
+
+    def test_no_changes(self):
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_markdown_change_renders_one_page(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Edited")
+        output = os.path.join(self.dest, "blog", "post.html")
+        self.assertEqual(self.watcher.poll(), [("render", post, output)])
+        self.assertEqual(self.read(output), "<title>Edited</title><div><h1>Edited</h1></div>")
+        self.assertIn(output.replace(os.sep, "/"), self.manifest.pages)
+
+    def test_template_change_renders_all_pages_and_copies_nothing(self):
+        self.write(self.template, "{{ Content }}")
+        actions = self.watcher.poll()
+        self.assertEqual(actions[0], ("reload", self.template, None))
+        self.assertEqual(sorted(action for action, _, _ in actions[1:]), ["render", "render"])
+        self.assertEqual(self.read(os.path.join(self.dest, "index.html")), "<div><h1>Home</h1></div>")
+
+    def test_static_change_copies_one_file(self):
+        css = os.path.join(self.static, "index.css")
+        self.write(css, "body { color: red; }")
+        output = os.path.join(self.dest, "index.css")
+        self.assertEqual(self.watcher.poll(), [("copy", css, output)])
+        self.assertEqual(self.read(output), "body { color: red; }")
+
+    def test_removed_source_removes_output(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Edited")
+        self.watcher.poll()
+        os.remove(post)
+        output = os.path.join(self.dest, "blog", "post.html")
+        self.assertEqual(self.watcher.poll(), [("remove", post, output)])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+
+    def test_failed_page_does_not_drop_other_actions(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        post_html = os.path.join(self.dest, "blog", "post.html")
+        index_html = os.path.join(self.dest, "index.html")
+        self.write(self.template, "{{ Content }}")
+        self.write(post, "# Post\n\nunclosed **bold")
+        with log.capture() as records:
+            actions = self.watcher.poll()
+        self.assertNotIn(("render", post, post_html), actions)
+        self.assertEqual([record["path"] for record in records if record["event"] == "rebuild_failed"], [post])
+        self.assertEqual(self.read(index_html), "<div><h1>Home</h1></div>")
+        self.assertIn(index_html.replace(os.sep, "/"), self.manifest.pages)
+        # The broken page is retried, and rendered once it is fixed
+        with log.capture() as records:
+            self.assertEqual(self.watcher.poll(), [])
+        self.assertEqual([record["path"] for record in records if record["event"] == "rebuild_failed"], [post])
+        self.write(post, "# Fixed")
+        self.assertEqual(self.watcher.poll(), [("render", post, post_html)])
+        self.assertEqual(self.read(post_html), "<div><h1>Fixed</h1></div>")
+
+    def test_draft_is_removed_not_rendered(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        output = os.path.join(self.dest, "blog", "post.html")
+        self.write(post, "# Post")
+        self.watcher.poll()
+        self.write(post, "---\ndraft: true\n---\n# Post")
+        self.assertEqual(self.watcher.poll(), [("remove", post, output)])
+        self.assertFalse(os.path.exists(output))
+        self.assertNotIn(output.replace(os.sep, "/"), self.manifest.pages)
+
+    def test_drafts_rendered_when_enabled(self):
+        watcher = SiteWatcher(self.content, self.static, self.template, self.dest, "/", drafts=True)
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "---\ndraft: true\n---\n# Draft")
+        self.assertEqual(watcher.poll(), [("render", post, os.path.join(self.dest, "blog", "post.html"))])
+
+    def test_precompressed_siblings_follow_outputs(self):
+        watcher = SiteWatcher(self.content, self.static, self.template, self.dest, "/", compressors=COMPRESSORS)
+        css = os.path.join(self.static, "index.css")
+        output = os.path.join(self.dest, "index.css")
+        self.write(css, "body { color: red; }")
+        watcher.poll()
+        with gzip.open(output + ".gz", "rt", encoding="utf-8") as sibling:
+            self.assertEqual(sibling.read(), "body { color: red; }")
+        self.write(css, "body { color: blue; }")
+        watcher.poll()
+        with gzip.open(output + ".gz", "rt", encoding="utf-8") as sibling:
+            self.assertEqual(sibling.read(), "body { color: blue; }")
+        os.remove(css)
+        watcher.poll()
+        self.assertFalse(os.path.exists(output + ".gz"))
+
+    def test_image_change_reruns_pipeline_and_renders_pages(self):
+        image = self.write(os.path.join(self.static, "a.png"), png_bytes(30, 20))
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "![A](/a.png)")
+        pipeline = ImagePipeline(self.static, self.dest, self.path("cache"))
+        pipeline.run()
+        watcher = SiteWatcher(self.content, self.static, self.template, self.dest, "/", self.manifest, images=pipeline)
+        output = os.path.join(self.dest, "blog", "post.html")
+        watcher.apply("render", post, output)
+        self.assertIn('width="30" height="20" loading="lazy"', self.read(output))
+
+        self.write(image, png_bytes(40, 10))
+        actions = watcher.poll()
+        self.assertEqual(actions[0], ("images", self.static, None))
+        self.assertIn(("render", post, output), actions)
+        self.assertIn('width="40" height="10" loading="lazy"', self.read(output))
+        self.assertEqual(
+            self.manifest.pages[output.replace(os.sep, "/")]["template_hash"],
+            page_template_hash(self.template, pipeline.attributes()),
+        )
+
+    def test_site_index_follows_page_changes(self):
+        site_index = SiteIndex(self.dest)
+        watcher = SiteWatcher(self.content, self.static, self.template, self.dest, "/", site_index=site_index)
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "---\ntags: [Elves]\n---\n# Renamed")
+        watcher.poll()
+        listing = os.path.join(self.dest, "blog", "index.html")
+        self.assertIn('<a href="/blog/post.html">Renamed</a>', self.read(listing))
+        self.assertIn("Renamed", self.read(os.path.join(self.dest, "tags", "elves", "index.html")))
+        os.remove(post)
+        watcher.poll()
+        self.assertNotIn("blog/post.html", site_index.entries)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "tags")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+import os
+import time
+
+from assets import sync_file
+from build_log import DEBUG, log
+from compress import COMPRESSIBLE_EXTENSIONS, precompress_file
+from front_matter import is_draft, read_fields
+from images import IMAGE_EXTENSIONS
+from manifest import hash_file
+from pages import generate_page, page_template_hash, remove_empty_dirs
+from template import load_template
+
+
+class SiteWatcher:
+    """
+    Watches the content directory, the static directory and the template for
+    changes and rebuilds only the outputs each change affects:
+    the template affects every page but no static file, a markdown file affects
+    its own page, and a static file affects its own copy.
+    Pages marked "draft: true" are removed rather than rendered unless drafts
+    is True, as in a full build.
+    With compressors (see precompress_file), the compressed siblings of
+    rebuilt HTML and CSS outputs are kept up to date as well.
+    With images, an ImagePipeline that has already run, a changed image
+    reruns the pipeline and, since pages depend on the image attributes like
+    on the template, re-renders every page.
+    With a site_index (see SiteIndex), the entries of rebuilt and removed pages
+    are updated and its listings, tag pages and feed rewritten after each
+    rebuild that touched a page or the template.
+    The compiled template and the file snapshot stay in memory between rebuilds.
+    """
+
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, base_path, manifest=None, block_cache=None,
+                 drafts=False, compressors=None, images=None, site_index=None, site_url=""):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.dest_dir = os.path.normpath(dest_dir)
+        self.base_path = base_path
+        self.manifest = manifest
+        self.block_cache = block_cache
+        self.drafts = drafts
+        self.compressors = compressors
+        self.images = images
+        self.image_attributes = images.attributes() if images is not None else None
+        self.site_index = site_index
+        self.site_url = site_url
+        self.template = load_template(self.template_path, base_path)
+        self.template_hash = page_template_hash(self.template_path, self.image_attributes)
+        self.snapshot = self.scan()
+
+    def scan(self):
+        """
+        Returns a {path: (size, mtime_ns)} snapshot of every watched file.
+        """
+        snapshot = {}
+        for directory in (self.content_dir, self.static_dir):
+            for root, dirs, files in os.walk(directory):
+                for file_name in files:
+                    path = os.path.join(root, file_name)
+                    snapshot[path] = _stat_key(path)
+        if os.path.exists(self.template_path):
+            snapshot[self.template_path] = _stat_key(self.template_path)
+        return snapshot
+
+    def output_for(self, source):
+        """
+        Returns the output path built from a watched source file, or None.
+        """
+        if _is_within(source, self.content_dir):
+            if not source.endswith(".md"):
+                return None
+            relative_path = os.path.relpath(source, self.content_dir)
+            return os.path.join(self.dest_dir, relative_path[: -len(".md")] + ".html")
+        if _is_within(source, self.static_dir):
+            return os.path.join(self.dest_dir, os.path.relpath(source, self.static_dir))
+        return None
+
+    def plan(self, changed, removed):
+        """
+        Maps changed and removed source files to a list of (action, source, output)
+        tuples, where action is "reload", "images", "render", "copy" or "remove".
+        """
+        actions = []
+        rendered = set()
+        if self.template_path in changed:
+            actions.append(("reload", self.template_path, None))
+        if self.images is not None and any(
+            _is_within(path, self.static_dir) and path.lower().endswith(IMAGE_EXTENSIONS)
+            for path in [*changed, *removed]
+        ):
+            actions.append(("images", self.static_dir, None))
+        if actions:
+            # Every page depends on the template and the image attributes
+            changed = sorted(set(changed) | {
+                path for path in self.snapshot
+                if _is_within(path, self.content_dir) and path.endswith(".md")
+            })
+        for source in changed:
+            output = self.output_for(source)
+            if output is None or output in rendered:
+                continue
+            rendered.add(output)
+            if _is_within(source, self.content_dir):
+                if not self.drafts and is_draft(read_fields(source)):
+                    actions.append(("remove", source, output))
+                else:
+                    actions.append(("render", source, output))
+            else:
+                actions.append(("copy", source, output))
+        for source in removed:
+            output = self.output_for(source)
+            if output is not None:
+                actions.append(("remove", source, output))
+        return actions
+
+    def apply(self, action, source, output):
+        if action == "reload":
+            self.template = load_template(self.template_path, self.base_path)
+            self.template_hash = page_template_hash(self.template_path, self.image_attributes)
+        elif action == "images":
+            self.images.run()
+            self.image_attributes = self.images.attributes()
+            self.template_hash = page_template_hash(self.template_path, self.image_attributes)
+        elif action == "render":
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            generate_page(
+                source,
+                self.template_path,
+                output,
+                self.base_path,
+                self.template,
+                block_cache=self.block_cache,
+                images=self.image_attributes,
+            )
+            if self.manifest is not None:
+                self.manifest.record(output, source, hash_file(source), self.template_hash, self.base_path)
+            if self.site_index is not None:
+                self.site_index.update([(source, output)])
+            self.precompress(output)
+        elif action == "copy":
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            with log.timed(DEBUG, "file_copied", f"Copied file: {source} -> {output}", path=output):
+                sync_file(source, output)
+            if self.manifest is not None:
+                stat = os.stat(source)
+                self.manifest.record_asset(output, source, stat.st_size, stat.st_mtime_ns)
+            self.precompress(output)
+        elif action == "remove":
+            for sibling in [output + extension for extension in self.compressors or ()]:
+                if os.path.exists(sibling):
+                    os.remove(sibling)
+            if os.path.exists(output):
+                os.remove(output)
+                log.debug("file_removed", f"Removed: {output}", path=output)
+                remove_empty_dirs(os.path.dirname(output), self.dest_dir)
+            if self.manifest is not None:
+                self.manifest.forget(output)
+                self.manifest.forget_asset(output)
+            if self.site_index is not None:
+                self.site_index.forget(output)
+        else:
+            raise ValueError(f"invalid watch action: {action}")
+
+    def precompress(self, output):
+        """
+        Rewrites the compressed siblings of output if it is an HTML or CSS file
+        that changed since they were written.
+        """
+        if self.compressors is not None and output.endswith(COMPRESSIBLE_EXTENSIONS):
+            written = precompress_file(output, self.compressors)
+            if written:
+                log.debug("file_precompressed", f"Precompressed: {output}", path=output, written=written)
+
+    def poll(self):
+        """
+        Checks the watched files once and rebuilds whatever changed.
+        An action that fails is logged and the remaining actions still run;
+        the snapshot entries of its sources are restored so the next poll
+        retries it.
+        Returns the actions that were applied.
+        """
+        previous = self.snapshot
+        current = self.scan()
+        changed = sorted(path for path in current if previous.get(path) != current[path])
+        removed = sorted(path for path in previous if path not in current)
+        self.snapshot = current
+        actions = []
+        for action, source, output in self.plan(changed, removed):
+            try:
+                self.apply(action, source, output)
+            except Exception as e:
+                log.error("rebuild_failed", f"Rebuild of {source} failed: {e}", path=source)
+                if action == "images":
+                    sources = [path for path in [*changed, *removed] if _is_within(path, self.static_dir)
+                               and path.lower().endswith(IMAGE_EXTENSIONS)]
+                else:
+                    sources = [source]
+                for path in sources:
+                    if path in previous:
+                        self.snapshot[path] = previous[path]
+                    else:
+                        self.snapshot.pop(path, None)
+                continue
+            actions.append((action, source, output))
+        if self.site_index is not None and any(
+            action in ("reload", "images") or _is_within(source, self.content_dir) for action, source, _ in actions
+        ):
+            self.write_index_pages()
+        return actions
+
+    def write_index_pages(self):
+        self.site_index.write_pages(self.template_path, self.base_path, self.site_url)
+        for key in self.site_index.generated:
+            self.precompress(os.path.join(self.dest_dir, *key.split("/")))
+
+    def run(self, interval=0.5, on_rebuild=None):
+        """
+        Polls for changes every interval seconds until interrupted.
+        A failing rebuild is reported and the watcher keeps running.
+        """
+        log.info(
+            "watching", f"Watching '{self.content_dir}', '{self.static_dir}' and '{self.template_path}' for changes."
+        )
+        log.flush()
+        try:
+            while True:
+                time.sleep(interval)
+                started = time.perf_counter()
+                try:
+                    actions = self.poll()
+                except Exception as e:
+                    log.error("rebuild_failed", f"Rebuild failed: {e}")
+                    continue
+                if not actions:
+                    continue
+                elapsed = time.perf_counter() - started
+                log.info(
+                    "rebuilt",
+                    f"Rebuilt {len(actions)} output(s) in {elapsed * 1000:.0f} ms.",
+                    outputs=len(actions),
+                    duration_ms=elapsed * 1000,
+                )
+                log.flush()
+                if on_rebuild is not None:
+                    on_rebuild(actions)
+        except KeyboardInterrupt:
+            log.info("stopped", "Stopped watching.")
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _is_within(path, directory):
+    return path.startswith(directory + os.sep)